@@ -0,0 +1,101 @@
+"""Asyncio variant of main.Client for multiplexing many devices on one loop.
+
+AsyncClient reuses Client's key handling, signing and request builders; only
+the transport differs (aiohttp instead of requests) and the I/O methods are
+coroutines. Waits use asyncio.sleep/wait_for, so cancelling the task that runs
+approve_pending stops it straight away.
+"""
+import asyncio
+import time
+
+import aiohttp
+
+from main import DEFAULT_POOL_SIZE, STATE_FILE, Client
+
+
+class AsyncClient(Client):
+    def __init__(self, *args, http=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = http
+
+    @classmethod
+    def from_state(cls, state=STATE_FILE, **kwargs):
+        c = cls(**kwargs)
+        c.import_state(state)
+        return c
+
+    @property
+    def http(self):
+        # Created lazily so it binds to the running event loop.
+        if self._http is None:
+            connect, read = self.timeout if isinstance(self.timeout, tuple) else (self.timeout, self.timeout)
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size or DEFAULT_POOL_SIZE, ssl=False),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def get_transactions(self):
+        path, data, headers = self.transactions_request()
+        async with self.http.get(self.url(path), params=data, headers=headers) as r:
+            return await r.json(content_type=None)
+
+    async def reply_transaction(self, transactionid, answer):
+        path, data, headers = self.reply_request(transactionid, answer)
+        async with self.http.post(self.url(path), data=data, headers=headers) as r:
+            return await r.json(content_type=None)
+
+    async def device_info(self):
+        path, data, headers = self.info_request()
+        async with self.http.get(self.url(path), params=data, headers=headers) as r:
+            return await r.json(content_type=None)
+
+    async def reply_transactions(self, transactions, answer):
+        """Answer every transaction concurrently; same records as Client.reply_transactions."""
+        async def reply(tx):
+            start = time.perf_counter()
+            try:
+                record = {"response": await self.reply_transaction(tx["urgid"], answer)}
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                record = {"error": e}
+            record.update(urgid=tx["urgid"], seconds=time.perf_counter() - start)
+            return record
+
+        return await asyncio.gather(*(reply(tx) for tx in transactions))
+
+    async def approve_pending(self, timeout=60, poll_interval=0.5, answer="approve"):
+        """Answer all pending transactions, waiting at most timeout seconds for one."""
+        async def poll():
+            while True:
+                try:
+                    reply = await self.get_transactions()
+                    if not isinstance(reply, dict) or reply.get("stat") != "OK":
+                        raise ValueError(f"Duo transactions request failed: {reply}")
+                    transactions = reply["response"]["transactions"]
+                except aiohttp.ClientConnectionError:
+                    print("Connection Error")
+                    transactions = []
+                except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError, ValueError) as e:
+                    # One slow or bad poll is not the overall timeout; wait_for cancels
+                    # this coroutine rather than raising TimeoutError inside it.
+                    print(f"Polling Duo transactions failed: {e!r}")
+                    transactions = []
+                if transactions:
+                    return await self.reply_transactions(transactions, answer)
+                await asyncio.sleep(poll_interval)
+
+        try:
+            return await asyncio.wait_for(poll(), timeout)
+        except asyncio.TimeoutError:
+            return []
@@ -0,0 +1,52 @@
+"""Measure AsyncClient poll throughput against the stub Duo server.
+
+    python3 bench/bench_async.py --devices 50 --polls 40
+
+Reports how many signed polls per second one event loop thread sustains;
+tests/test_async_client.py checks its behaviour against the same stub.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.PublicKey import RSA  # noqa: E402
+
+from async_client import AsyncClient  # noqa: E402
+from stub_duo import StubDuoServer  # noqa: E402
+
+
+async def run(server, devices, polls):
+    key = RSA.generate(2048)
+    clients = [AsyncClient(akey=f"DA{i}", pkey=f"DP{i}", host=server.duo_host, base_url=server.url)
+               for i in range(devices)]
+    for c in clients:
+        c.pubkey = key
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(c.get_transactions() for c in clients for _ in range(polls)))
+        elapsed = time.perf_counter() - start
+        print(f"{devices * polls} polls across {devices} devices: {devices * polls / elapsed:.0f} polls/s")
+    finally:
+        await asyncio.gather(*(c.aclose() for c in clients))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=40, help="Polls per device")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial server delay in seconds")
+    args = parser.parse_args()
+
+    server = StubDuoServer(latency=args.latency).start()
+    try:
+        asyncio.run(run(server, args.devices, args.polls))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compare claim latency on a fresh connection with a pre-warmed PlatformClient.
+
+Runs against bench/stub_platform.py; --connect-latency stands in for the
+DNS + TCP + TLS handshake that a cold claim pays:
+
+    python3 bench/bench_claim.py --claims 50 --connect-latency 0.05
+
+--pipeline N then publishes N tasks at once and claims them through
+claims.ClaimPipeline against a stub limited to --rate-limit requests per
+second, reporting claims per minute, 429s and the rate the governor settled on.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claims import ClaimPipeline  # noqa: E402
+from platform_client import PlatformClient, RateGovernor  # noqa: E402
+from stub_platform import StubPlatformServer  # noqa: E402
+
+CLAIM_PATH = "/api/tasks/v1/organizations/org/listings/listing/campaigns/campaign/tasks/{}/transitions"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def claim(server, client, task_id):
+    server.add_task(task_id)
+    start = time.perf_counter()
+    response = client.post(CLAIM_PATH.format(task_id), "bench-token", json={"type": "CLAIM"})
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 201, response.status_code
+    return elapsed
+
+
+def unthrottled():
+    """A governor that never holds a request, so the latency runs time connections, not pacing."""
+    return RateGovernor(rate=1e6, burst=1e6, max_rate=1e6)
+
+
+def run_cold(server, count):
+    """A new client per claim, like the old module-level requests.post calls."""
+    samples = []
+    for i in range(count):
+        client = PlatformClient(base_url=server.url, governor=unthrottled())
+        samples.append(claim(server, client, f"cold-{i}"))
+        client.session.close()
+    return samples
+
+
+def run_warm(server, count):
+    client = PlatformClient(base_url=server.url, governor=unthrottled())
+    samples = []
+    for i in range(count):
+        client.warm()  # what start_warming's background thread does between poll cycles
+        samples.append(claim(server, client, f"warm-{i}"))
+    client.session.close()
+    return samples
+
+
+class StaticTokens:
+    def get(self):
+        return "bench-token"
+
+    def refresh(self, stale=None):
+        return "bench-token"
+
+
+def post_claim(client, token, task):
+    return client.post(CLAIM_PATH.format(task["id"]), token, json={"type": "CLAIM"})
+
+
+def run_pipeline(server, count, workers):
+    client = PlatformClient(base_url=server.url)
+    pipeline = ClaimPipeline(client, StaticTokens(), post_claim, workers=workers,
+                             on_result=lambda *args: None).start()
+    for i in range(count):
+        server.add_task(f"pipe-{i}", payout={"amount": i})
+    start = time.perf_counter()
+    for task in server.open_tasks():
+        pipeline.submit(task)
+    pipeline.join()
+    elapsed = time.perf_counter() - start
+    print(f"pipeline: {pipeline.counts} in {elapsed:.2f} s "
+          f"({pipeline.counts['claimed'] / elapsed * 60:.0f} claims/min), "
+          f"{server.rejected} x 429, governor rate {client.governor.rate:.2f} req/s")
+
+
+def report(name, samples):
+    print(f"{name:>6}: mean {statistics.mean(samples) * 1000:7.2f} ms  "
+          f"p50 {percentile(samples, 50) * 1000:7.2f} ms  "
+          f"p99 {percentile(samples, 99) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--claims", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial server delay in seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.05,
+                        help="Artificial delay per new connection in seconds")
+    parser.add_argument("--pipeline", type=int, default=0, help="Tasks to claim through ClaimPipeline")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--rate-limit", type=int, default=5, help="Stub requests per second before 429s")
+    args = parser.parse_args()
+
+    server = StubPlatformServer(latency=args.latency, connect_latency=args.connect_latency).start()
+    try:
+        report("cold", run_cold(server, args.claims))
+        report("warm", run_warm(server, args.claims))
+        print(f"{server.connections} connections for {server.requests} requests")
+        if args.pipeline:
+            server.rate_limit = args.rate_limit
+            run_pipeline(server, args.pipeline, args.workers)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
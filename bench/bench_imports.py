@@ -0,0 +1,51 @@
+"""Import cost per cli command versus importing every tool's dependencies.
+
+    python3 bench/bench_imports.py --runs 5
+
+Each measurement is a fresh interpreter importing the command's module
+(which no longer does any work at import time).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from cli import COMMANDS  # noqa: E402
+
+EAGER = "import requests, bs4, Crypto.PublicKey.RSA, selenium.webdriver"
+
+
+def time_import(code, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True)
+        samples.append(time.perf_counter() - start)
+        if result.returncode:
+            return None
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = time_import("pass", args.runs)
+    print(f"{'interpreter':>15}: {baseline * 1000:7.1f} ms")
+    for label, code in [("cli", "import cli"), ("all deps", EAGER)] + \
+            [(name, f"import {module}") for name, (module, _) in COMMANDS.items()]:
+        median = time_import(code, args.runs)
+        if median is None:
+            print(f"{label:>15}: import failed (missing dependency?)")
+        else:
+            print(f"{label:>15}: {median * 1000:7.1f} ms  (+{(median - baseline) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Simulate time-to-discovery for a fixed poll interval and the learned PollScheduler.
+
+Tasks are published in clusters, mostly on weekday afternoons. Both pollers
+run over the same simulated weeks; the scheduler learns its profile in the
+first half and both are measured over the second half:
+
+    python3 bench/bench_polling.py --weeks 8 --interval 30
+"""
+import argparse
+import bisect
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poll_scheduler import PollScheduler  # noqa: E402
+
+WEEK = 7 * 24 * 3600
+
+
+def publications(start, weeks, busy_rate, quiet_rate, seed):
+    """Sorted publish times: clusters of 2-8 tasks over a few minutes."""
+    rng = random.Random(seed)
+    times = []
+    t = start
+    while t < start + weeks * WEEK:
+        local = time.localtime(t)
+        busy = local.tm_wday < 5 and 14 <= local.tm_hour < 18
+        t += rng.expovariate((busy_rate if busy else quiet_rate) / 3600)
+        times.extend(t + rng.uniform(0, 300) for _ in range(rng.randint(2, 8)))
+    return sorted(times)
+
+
+def simulate(published, start, end, measure_from, interval_for, observe):
+    delays = []
+    polls = 0
+    t = start
+    last = start
+    while t < end:
+        lo = bisect.bisect_right(published, last)
+        hi = bisect.bisect_right(published, t)
+        observe(hi - lo, t)
+        if t >= measure_from:
+            polls += 1
+            delays.extend(t - p for p in published[lo:hi])
+        last = t
+        t += interval_for(t)
+    return delays, polls
+
+
+def report(name, delays, polls):
+    print(f"{name:>9}: {polls:6d} polls  median {statistics.median(delays):6.1f} s  "
+          f"mean {statistics.mean(delays):6.1f} s  p90 {sorted(delays)[int(len(delays) * 0.9)]:6.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=30, help="Fixed poll interval in seconds")
+    parser.add_argument("--busy-rate", type=float, default=4, help="Clusters per hour on weekday afternoons")
+    parser.add_argument("--quiet-rate", type=float, default=0.1, help="Clusters per hour otherwise")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, -1))  # a Monday, local time
+    end = start + args.weeks * WEEK
+    measure_from = start + args.weeks // 2 * WEEK
+    published = publications(start, args.weeks, args.busy_rate, args.quiet_rate, args.seed)
+
+    fixed = simulate(published, start, end, measure_from, lambda t: args.interval, lambda n, t: None)
+    report("fixed", *fixed)
+
+    def run(base):
+        scheduler = PollScheduler("bench", base_interval=base, min_interval=5, max_interval=args.interval * 4,
+                                  burst_interval=5, burst_duration=120, path=None)
+        return simulate(published, start, end, measure_from, scheduler.interval, scheduler.observe)
+
+    # Stretch the scheduler's base interval until it spends no more polls than the fixed poller.
+    base = args.interval
+    learned = run(base)
+    while learned[1] > fixed[1]:
+        base *= 1.01
+        learned = run(base)
+    report("learned", *learned)
+    print(f"learned base interval {base:.1f} s for the same request budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Signing microbenchmark: signatures per second and p99 latency per backend.
+
+    python3 bench/bench_signing.py --devices 8 --signatures 2000
+
+Each device gets its own key and RequestSigner, signed round-robin, the way one
+process approving for many devices would.
+"""
+import argparse
+import email.utils
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.PublicKey import RSA  # noqa: E402
+
+from main import SIGNER_BACKENDS, RequestSigner  # noqa: E402
+
+PATH = "/push/v2/device/transactions"
+DATA = {"akey": "DAbench", "fips_status": "1", "hsm_status": "true", "pkpush": "rsa-sha512"}
+
+
+def bench(backend, keys, count):
+    signers = [RequestSigner(key, f"DPbench{i}", "api-bench.duosecurity.com", backend)
+               for i, key in enumerate(keys)]
+    date = email.utils.formatdate(usegmt=True)
+    samples = []
+    started = time.perf_counter()
+    for i in range(count):
+        start = time.perf_counter()
+        signers[i % len(signers)].sign("GET", PATH, date, DATA)
+        samples.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{backend:>13}: {count / elapsed:8.0f} sig/s  "
+          f"mean {statistics.mean(samples) * 1000:6.3f} ms  p99 {p99 * 1000:6.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--signatures", type=int, default=1000)
+    parser.add_argument("--backend", choices=sorted(SIGNER_BACKENDS), action="append",
+                        help="Backend to measure (repeatable, default: all available)")
+    args = parser.parse_args()
+
+    keys = [RSA.generate(2048) for _ in range(args.devices)]
+    for backend in args.backend or sorted(SIGNER_BACKENDS):
+        try:
+            bench(backend, keys, args.signatures)
+        except ImportError as e:
+            print(f"{backend:>13}: unavailable ({e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Approver cold start: fresh interpreter until the Client is ready to poll.
+
+    python3 bench/bench_startup.py --runs 10
+
+Compares loading the cached state file with the old start-up path, which
+generated an RSA key and then discarded it for key.pem/response.json.
+"first poll" adds the session and the first signed request, whose imports
+and key parsing the load path leaves until they are needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from main import Client  # noqa: E402
+
+STARTUP = {
+    "state file": "import main; main.Client.load()",
+    # The imports and key parsing the load path defers, paid when the first poll goes out.
+    "first poll": "import main; c = main.Client.load(); c.session; c.transactions_request()",
+    "legacy": ("import main; c = main.Client(); c.pubkey; "
+               "c.import_key('key.pem'); c.import_response('response.json')"),
+}
+
+
+def time_startup(code, cwd, runs):
+    env = dict(os.environ, PYTHONPATH=REPO)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        c = Client(akey="DAbench", pkey="DPbench", host="api-bench.duosecurity.com")
+        c.info = {"akey": c.akey, "pkey": c.pkey, "host": c.host}
+        c.export_key(os.path.join(cwd, "key.pem"))
+        with open(os.path.join(cwd, "response.json"), "w") as f:
+            json.dump(c.info, f)
+        c.export_state(os.path.join(cwd, "duo_state.json"))
+
+        time_startup("pass", cwd, 1)
+        baseline = statistics.median(time_startup("pass", cwd, args.runs))
+        print(f"{'interpreter':>11}: median {baseline * 1000:7.1f} ms")
+        for name, code in STARTUP.items():
+            median = statistics.median(time_startup(code, cwd, args.runs))
+            print(f"{name:>11}: median {median * 1000:7.1f} ms  "
+                  f"(+{(median - baseline) * 1000:.1f} ms over a bare interpreter)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the pooled Client transport with a fresh connection per request.
+
+Runs against bench/stub_duo.py, so no Duo account or network is needed:
+
+    python3 bench/bench_transport.py --requests 200 --latency 0.005
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from main import Client, make_session  # noqa: E402
+from stub_duo import StubDuoServer  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(client, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get_transactions()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class UnpooledSession(requests.Session):
+    """Opens a new connection for every request, like the old bare requests.get calls."""
+
+    def request(self, *args, **kwargs):
+        with make_session(pool_size=1) as session:
+            return session.request(*args, **kwargs)
+
+
+def report(name, samples):
+    print(f"{name:>10}: mean {statistics.mean(samples) * 1000:7.2f} ms  "
+          f"p50 {percentile(samples, 50) * 1000:7.2f} ms  "
+          f"p99 {percentile(samples, 99) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial server delay in seconds")
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    server = StubDuoServer(latency=args.latency).start()
+    try:
+        pooled = Client(akey="DAbench", pkey="DPbench", host=server.duo_host,
+                        base_url=server.url, pool_size=args.pool_size)
+        unpooled = Client(akey="DAbench", pkey="DPbench", host=server.duo_host,
+                          base_url=server.url, session=UnpooledSession())
+        unpooled.pubkey = pooled.pubkey
+        run(pooled, 5)
+
+        report("pooled", run(pooled, args.requests))
+        report("unpooled", run(unpooled, args.requests))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Local stand-in for the Duo device API, for offline benchmarks.
+
+Serves the handful of /push/v2/device endpoints main.Client talks to over
+plain HTTP/1.1 with keep-alive. Point a client at it with
+Client(..., base_url=server.url).
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+TRANSACTIONS_PATH = "/push/v2/device/transactions"
+
+
+class StubDuoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; split writes on a keep-alive
+    # connection stall on delayed ACKs and would swamp the measurements.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body, status=200):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.server.hit()
+        path = urlparse(self.path).path
+        if path == TRANSACTIONS_PATH:
+            self._reply({"stat": "OK", "response": {"transactions": self.server.pending()}})
+        elif path == "/push/v2/device/info":
+            self._reply({"stat": "OK", "response": {"host": self.server.duo_host}})
+        else:
+            self._reply({"stat": "FAIL", "message": "not found"}, 404)
+
+    def do_POST(self):
+        self.server.hit()
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        path = urlparse(self.path).path
+        if path.startswith(TRANSACTIONS_PATH + "/"):
+            self.server.answer(path.rsplit("/", 1)[1])
+            self._reply({"stat": "OK", "response": {"result": "OK"}})
+        elif path == "/push/v2/device/registration":
+            self._reply({"stat": "OK", "response": {}})
+        else:
+            self._reply({"stat": "FAIL", "message": "not found"}, 404)
+
+
+class StubDuoServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, duo_host="api-stub.duosecurity.com"):
+        super().__init__(address, StubDuoHandler)
+        self.latency = latency
+        self.duo_host = duo_host
+        self.requests = 0
+        self.answered = []
+        self._transactions = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hit(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def push(self, urgid):
+        """Queue a pending transaction, as if a login had just pushed."""
+        with self._lock:
+            self._transactions.append({"urgid": urgid, "summary": "stub push"})
+
+    def pending(self):
+        with self._lock:
+            return list(self._transactions)
+
+    def answer(self, urgid):
+        with self._lock:
+            self._transactions = [t for t in self._transactions if t["urgid"] != urgid]
+            self.answered.append(urgid)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local stand-in Duo device API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial per-request delay in seconds")
+    args = parser.parse_args()
+
+    server = StubDuoServer(("127.0.0.1", args.port), latency=args.latency)
+    print(f"Stub Duo listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,167 @@
+"""Local stand-in for the platform.synack.com API used by the mission bots.
+
+Serves task listing, claim transitions, target listing, signup and
+resource_reads over plain HTTP/1.1 with keep-alive. connect_latency is paid
+once per new connection, standing in for the DNS + TCP + TLS handshake a
+fresh connection to the real platform costs. Point a bot at it with
+PlatformClient(base_url=server.url).
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubPlatformHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; see stub_duo.StubDuoHandler.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connected()
+
+    def _reply(self, body=None, status=200, headers=()):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _limited(self):
+        retry_after = self.server.hit()
+        if retry_after is None:
+            return False
+        self._reply({"error": "rate limited"}, 429, [("Retry-After", str(retry_after))])
+        return True
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self._limited():
+            return
+        url = urlparse(self.path)
+        path = url.path
+        if path == "/api/tasks/v2/tasks":
+            query = parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            per_page = int(query.get("perPage", ["20"])[0])
+            self._reply(self.server.open_tasks()[(page - 1) * per_page:page * per_page])
+        elif path == "/api/targets":
+            self._reply(self.server.targets)
+        elif path == "/api/resource_reads":
+            self._reply(status=204)
+        else:
+            self._reply({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self._limited():
+            return
+        path = urlparse(self.path).path
+        if path.startswith("/api/tasks/v1/") and path.endswith("/transitions"):
+            task_id = path.split("/")[-2]
+            self._reply({}, 201 if self.server.claim(task_id) else 412)
+        elif path.startswith("/api/targets/") and path.endswith("/signup"):
+            self._reply({})
+        else:
+            self._reply({"error": "not found"}, 404)
+
+
+class StubPlatformServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, connect_latency=0.0, rate_limit=None):
+        super().__init__(address, StubPlatformHandler)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.rate_limit = rate_limit  # requests per second before answering 429, or None
+        self.requests = 0
+        self.connections = 0
+        self.rejected = 0
+        self.targets = []
+        self._tasks = {}
+        self._window = (0, 0)  # (second, requests in it)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def connected(self):
+        with self._lock:
+            self.connections += 1
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+
+    def hit(self):
+        """Count a request; returns a Retry-After in seconds if it is over rate_limit."""
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit is not None:
+                second = int(time.monotonic())
+                start, count = self._window
+                count = count + 1 if start == second else 1
+                self._window = (second, count)
+                if count > self.rate_limit:
+                    self.rejected += 1
+                    return 1
+        if self.latency:
+            time.sleep(self.latency)
+        return None
+
+    def add_task(self, task_id, **fields):
+        """Publish a claimable task, as the platform would."""
+        task = {"id": task_id, "organizationUid": "org", "listingUid": "listing",
+                "campaignUid": "campaign", "payout": {"amount": 0}}
+        task.update(fields)
+        with self._lock:
+            self._tasks[task_id] = task
+
+    def open_tasks(self):
+        with self._lock:
+            return list(self._tasks.values())
+
+    def claim(self, task_id):
+        with self._lock:
+            return self._tasks.pop(task_id, None) is not None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local stand-in platform API.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial per-request delay in seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.0,
+                        help="Artificial delay per new connection in seconds")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests per second before 429s")
+    args = parser.parse_args()
+
+    server = StubPlatformServer(("127.0.0.1", args.port), latency=args.latency,
+                                connect_latency=args.connect_latency, rate_limit=args.rate_limit)
+    print(f"Stub platform listening on {server.url}")
+    server.serve_forever()
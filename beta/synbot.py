@@ -1,12 +1,18 @@
 import requests
-import time
-import urllib3
-import random
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 import argparse
-
-# Suppress only the single InsecureRequestWarning from urllib3 needed for `verify=False`.
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import os
+import sys
+
+# Shared modules live in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from claims import (PAGE_LOOKAHEAD, TASK_PAGE_SIZE, ClaimPipeline, CoalescingQueue, SeenTaskIndex,
+                    discover_tasks, report_claim)
+from platform_client import PlatformClient
+from poll_scheduler import target_scheduler, task_scheduler
+from targets import SignupPool, TargetStore, discover_targets, report_signup, unregistered_targets_path
+from token_manager import TokenHolder, first_of, login_in_process, prompt_for_token
 
 DEBUG = False  # Default: debugging is off
 
@@ -14,160 +20,155 @@ def debug_log(msg):
     if DEBUG:
         print(f"[DEBUG] {msg}")
 
-def get_task(token, proxies):
-    url = "https://platform.synack.com/api/tasks/v2/tasks"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+def get_task(client, token, page=1):
+    path = "/api/tasks/v2/tasks"
     params = {
-        "perPage": 20,
+        "perPage": TASK_PAGE_SIZE,
         "viewed": "true",
-        "page": 1,
+        "page": page,
         "status": "PUBLISHED",
         "sort": "CLAIMABLE",
         "sortDir": "DESC",
         "includeAssignedBySynackUser": "false"
     }
-    debug_log(f"GET tasks: {url}")
-    response = requests.get(url, headers=headers, params=params, proxies=proxies, verify=False)
+    debug_log(f"GET tasks: {path} page {page}")
+    response = client.get(path, token, params=params)
     debug_log(f"Response: {response.status_code}")
     return response
 
-def mark_target_as_read(token, listing_uid, proxies):
+def mark_target_as_read(client, token, listing_uid):
     """Marks a target as read using a GET request."""
-    url = f"https://platform.synack.com/api/resource_reads?resource_type=target&resource_id={listing_uid}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    debug_log(f"GET mark as read: {url}")
-    response = requests.get(url, headers=headers, proxies=proxies, verify=False)
+    path = f"/api/resource_reads?resource_type=target&resource_id={listing_uid}"
+    debug_log(f"GET mark as read: {path}")
+    response = client.get(path, token)
     if response.status_code != 204:
         debug_log(f"Failed to mark target as read: {response.status_code} {response.text}")
-    else:
-        debug_log(f"Target {listing_uid} marked as read.")
+        return False
+    debug_log(f"Target {listing_uid} marked as read.")
+    return True
 
-def post_claim_task(token, task_info, proxies):
-    mark_target_as_read(token, task_info['listingUid'], proxies)
-
-    url = (
-        "https://platform.synack.com/api/tasks/v1/"
+def post_claim_task(client, token, task_info):
+    path = (
+        "/api/tasks/v1/"
         f"organizations/{task_info['organizationUid']}/"
         f"listings/{task_info['listingUid']}/"
         f"campaigns/{task_info['campaignUid']}/"
         f"tasks/{task_info['id']}/transitions"
     )
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
     payload = {"type": "CLAIM"}
-    debug_log(f"POST claim task: {url} | Payload: {payload}")
-    response = requests.post(url, json=payload, headers=headers, proxies=proxies, verify=False)
+    debug_log(f"POST claim task: {path} | Payload: {payload}")
+    response = client.post(path, token, json=payload)
     debug_log(f"Response: {response.status_code} {response.text}")
     return response
 
-def poll_unregistered_targets(token, proxies, known_slugs):
+def poll_unregistered_targets(client, tokens, store, schedule, signups):
     while True:
-        url = (
-            "https://platform.synack.com/api/targets"
-            "?filter%5Bprimary%5D=unregistered&filter%5Bsecondary%5D=all&filter%5Bcategory%5D=all"
-            "&filter%5Bindustry%5D=all&filter%5Bpayout_status%5D=all"
-            "&sorting%5Bfield%5D=onboardedAt&sorting%5Bdirection%5D=desc"
-            "&pagination%5Bpage%5D=1&pagination%5Bper_page%5D=15"
-        )
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        new_targets = 0
+        token = tokens.get()
         debug_log("Polling unregistered targets...")
-        response = requests.get(url, headers=headers, proxies=proxies, verify=False)
+        try:
+            response = client.get(unregistered_targets_path(), token)
+        except requests.exceptions.RequestException as e:
+            debug_log(f"Target poll failed: {e}")
+            schedule.wait()
+            continue
         
         if response.status_code == 200:
-            targets = response.json()
-            for target in targets:
+            # Follows later pages until it reaches targets older than the ones already walked
+            # and only then signs up, concurrently: a signup takes its target off the paged list
+            signed = []
+            for target in discover_targets(lambda page: client.get(unregistered_targets_path(page), token),
+                                           response.json(), store):
                 slug = target['slug']
-                if slug not in known_slugs:
-                    debug_log(f"New target found: {slug}")
-                    known_slugs.add(slug)
-                    signup_target(token, slug, proxies, target.get("listingUid"))
+                debug_log(f"New target found: {slug}")
+                if not store.retrying(target["slug"]):
+                    new_targets += 1
+                signed.append(signups.submit(target))
+            # Outcomes are recorded in the store as signups finish; failed ones are retried later
+            signups.wait(signed)
+            store.save()
         
         elif response.status_code == 401:
-            token = refresh_token()
+            token = tokens.refresh(stale=token)
         
         elif response.status_code == 429:
-            delay = random.randint(10, 20)
-            debug_log(f"429 detected in target poll. Sleeping {delay}s.")
-            time.sleep(delay)
+            debug_log(f"429 detected in target poll. Requests paused {client.governor.blocked_for():.0f}s.")
         
         else:
             debug_log(f"Unexpected status code: {response.status_code}")
-        time.sleep(300)
+        schedule.observe(new_targets)
+        schedule.wait()
 
-def signup_target(token, slug, proxies, listing_uid=None):
-    url = f"https://platform.synack.com/api/targets/{slug}/signup"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+def signup_target(client, token, slug):
+    path = f"/api/targets/{slug}/signup"
     payload = {"ResearcherListing": {"terms": 1}}
-    debug_log(f"POST signup target: {url}")
-    response = requests.post(url, json=payload, headers=headers, proxies=proxies, verify=False)
-    
-    if response.status_code == 200:
-        print(f"Signed up for target {slug} successfully.")
-        if listing_uid:
-            mark_target_as_read(token, listing_uid, proxies)
-    else:
-        print(f"Failed to sign up for target {slug}. Status: {response.status_code}, Response: {response.text}")
-
-def refresh_token():
-    print("Token expired. Please enter a new token:")
-    return input("New Token: ")
+    debug_log(f"POST signup target: {path}")
+    return client.post(path, token, json=payload)
 
 def main(token):
     proxies = {}
-    known_slugs = set()
-
-    target_thread = Thread(target=poll_unregistered_targets, args=(token, proxies, known_slugs))
+    store = TargetStore()
+    # Shared by every thread; refreshes before expiry and once per burst of 401s,
+    # and adopts tokens other tools publish to /tmp/synacktoken.
+    tokens = TokenHolder(token, refresher=first_of(login_in_process, prompt_for_token))
+    tokens.watch_file().start()
+    # One pooled session for both threads, kept warm between poll cycles
+    client = PlatformClient(proxies).start_warming()
+    # Listings are marked read in the background once per listing, after the claim has gone out
+    mark_reads = CoalescingQueue(lambda listing_uid: mark_target_as_read(client, tokens.get(), listing_uid)).start()
+
+    def on_claim(task, outcome, response, seconds):
+        report_claim(task, outcome, response, seconds)
+        mark_reads.put(task['listingUid'])
+
+    def on_signup(target, response, seconds):
+        report_signup(target, response, seconds)
+        if response is not None and response.status_code == 200 and target.get("listingUid"):
+            mark_reads.put(target["listingUid"])
+
+    # New targets are signed up a few at a time on the shared client
+    signups = SignupPool(client, tokens, signup_target, on_result=on_signup, store=store)
+    # Claims run concurrently, best payout first, paced by the client's rate governor;
+    # tasks that were just claimed or answered 412 are skipped until their TTL runs out
+    seen = SeenTaskIndex()
+    task_schedule = task_scheduler()
+    # Later task pages are fetched concurrently while page 1 is being claimed
+    pages = ThreadPoolExecutor(max_workers=PAGE_LOOKAHEAD)
+    pipeline = ClaimPipeline(client, tokens, post_claim_task, on_result=on_claim, seen=seen).start()
+
+    target_thread = Thread(target=poll_unregistered_targets, args=(client, tokens, store, target_scheduler(), signups))
     target_thread.daemon = True
     target_thread.start()
 
     while True:
-        get_response = get_task(token, proxies)
+        new_tasks = 0
+        token = tokens.get()
+        try:
+            get_response = get_task(client, token)
+        except requests.exceptions.RequestException as e:
+            debug_log(f"Task poll failed: {e}")
+            task_schedule.wait()
+            continue
 
         if get_response.status_code == 401:
-            token = refresh_token()
+            token = tokens.refresh(stale=token)
             continue
         elif get_response.status_code == 429:
-            delay = random.randint(10, 20)
-            debug_log(f"429 detected in task poll. Sleeping {delay}s.")
-            time.sleep(delay)
+            debug_log(f"429 detected in task poll. Requests paused {client.governor.blocked_for():.0f}s.")
             continue
         elif get_response.status_code == 200:
-            tasks = get_response.json()
-            for task in tasks:
-                post_response = post_claim_task(token, task, proxies)
-                
-                if post_response.status_code == 401:
-                    token = refresh_token()
-                    continue
-                elif post_response.status_code == 429:
-                    delay = random.randint(10, 20)
-                    debug_log(f"429 detected in task claim. Sleeping {delay}s.")
-                    time.sleep(delay)
-                    continue
-                elif post_response.status_code == 201:
-                    print("Mission claimed successfully.")
-                elif post_response.status_code == 412:
-                    print("Mission cannot be claimed anymore.")
-                    break
-
-                time.sleep(11)
+            for task in discover_tasks(lambda page: get_task(client, token, page), get_response.json(),
+                                       seen=seen, executor=pages, settle=pipeline.join):
+                if task["id"] not in seen:  # not a resubmit whose seen entry has expired
+                    new_tasks += 1
+                pipeline.submit(task)
+            pipeline.join()
+            seen.save()
         else:
             debug_log(f"Failed to retrieve tasks. Status code: {get_response.status_code}")
-        time.sleep(30)
+        # Polls densely around the hours tasks usually appear, and in bursts right after one does
+        task_schedule.observe(new_tasks)
+        task_schedule.wait()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Poll and claim tasks and targets on Synack platform.")
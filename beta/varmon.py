@@ -1,11 +1,16 @@
 import argparse
 import json
 import os
+import sys
 import time
 import requests
 import urllib3
 from datetime import datetime
 
+# Shared modules live in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from token_manager import TokenHolder, read_token
+
 # Suppress SSL warnings globally
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -73,9 +78,10 @@ def send_change_notification(slug, old_val, new_val, proxies=None, debug=False):
     )
     send_slack_alert(message, proxies=proxies, debug=debug)
 
-def monitor_targets(slug_list, token, proxies=None, debug=False):
+def monitor_targets(slug_list, tokens, proxies=None, debug=False):
     cache = load_cache()
     while True:
+        token = tokens.get()
         try:
             for slug in slug_list:
                 current_varpay = get_varpay(slug, token, proxies=proxies, debug=debug)
@@ -111,6 +117,9 @@ def monitor_targets(slug_list, token, proxies=None, debug=False):
             time.sleep(POLL_INTERVAL)
 
         except ValueError as ve:
+            if tokens.refresh(stale=token) != token:
+                print("[+] Token was refreshed; retrying.")
+                continue
             print(f"[!] {ve}")
             send_slack_alert(f":warning: *Synack token is invalid or expired.* Monitoring stopped.", proxies=proxies, debug=debug)
             break
@@ -118,14 +127,21 @@ def monitor_targets(slug_list, token, proxies=None, debug=False):
 def main():
     parser = argparse.ArgumentParser(description="Monitor varpay change for one or more Synack targets.")
     parser.add_argument("slugs", help="Comma-separated list of target slug/listing_id")
-    parser.add_argument("--token", required=True, help="Synack Bearer token")
+    token_source = parser.add_mutually_exclusive_group(required=True)
+    token_source.add_argument("--token", help="Synack Bearer token")
+    token_source.add_argument("--token-file", help="Follow the token published to this file (e.g. /tmp/synacktoken)")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     parser.add_argument("--no-proxy", action="store_true", help="Disable default proxy usage")
     args = parser.parse_args()
 
     proxies = None if args.no_proxy else {"http": DEFAULT_PROXY, "https": DEFAULT_PROXY}
     slug_list = [slug.strip() for slug in args.slugs.split(",") if slug.strip()]
-    monitor_targets(slug_list, args.token, proxies=proxies, debug=args.debug)
+    if args.token_file:
+        tokens = TokenHolder(read_token(args.token_file), refresher=lambda: read_token(args.token_file))
+        tokens.watch_file(args.token_file)
+    else:
+        tokens = TokenHolder(args.token, refresher=None)
+    monitor_targets(slug_list, tokens, proxies=proxies, debug=args.debug)
 
 if __name__ == "__main__":
     main()
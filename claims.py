@@ -0,0 +1,355 @@
+"""Concurrent claim pipeline for the mission bots.
+
+Tasks found by a poll go into a priority queue (highest payout first, then
+first seen) and a few worker threads claim them on the bot's PlatformClient.
+Pacing is left to the client's RateGovernor, which learns the permitted rate
+from 429s, so there are no fixed sleeps between claims. A SeenTaskIndex
+keeps tasks that were just claimed or answered 412 out of the next cycles,
+and discover_tasks() streams every page of the task list into the queue.
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import requests
+
+CLAIM_WORKERS = 3
+CLAIM_ATTEMPTS = 3  # per task, across 401 refreshes and 429s
+TASK_PAGE_SIZE = 20
+PAGE_LOOKAHEAD = 2  # later pages fetched concurrently
+MAX_TASK_PAGES = 25
+HANDLED_TTL = 600  # seconds a CoalescingQueue drops a key after handling it
+
+CLAIMED = "claimed"
+GONE = "412"
+ERROR = "error"
+
+SEEN_TASKS_FILE = "seen_tasks.json"
+# How long each outcome keeps a task from being claimed again, in seconds.
+SEEN_TTL = {
+    CLAIMED: 24 * 3600,  # ours; it only comes back if we release it
+    GONE: 3600,  # claimed by someone else; retry in case it is released
+    ERROR: 60,  # next cycle or the one after
+}
+SEEN_RETENTION = 24 * 3600  # seconds an expired entry is kept, so a resubmit is not news
+
+
+def task_priority(task):
+    """Lower sorts first: the best-paid task is claimed first."""
+    payout = task.get("payout") or {}
+    try:
+        return -float(payout.get("amount") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def discover_tasks(fetch_page, first_page, seen=None, executor=None, per_page=TASK_PAGE_SIZE,
+                   lookahead=PAGE_LOOKAHEAD, max_pages=MAX_TASK_PAGES, settle=None):
+    """Yield the tasks of first_page, then of the following pages as they arrive.
+
+    fetch_page(page) returns the response for that page of the task list.
+    With an executor, up to `lookahead` later pages are fetched concurrently
+    while the caller is still consuming earlier ones. Paging stops at a short
+    page, a failed request, or a page with no task that is still PUBLISHED
+    and worth claiming according to `seen`; the list is sorted claimable
+    first, so nothing further down would be either.
+
+    Pages are fetched by offset and a claim takes its task off the list, so
+    claims finishing mid-walk shift tasks past the later pages. With
+    settle (the pipeline's join), a walk that went past page 1 and found
+    something is followed, once settle() returns, by another walk from
+    page 1 that yields only tasks not yielded before.
+    """
+    yielded = set()
+    tasks = first_page
+    while True:
+        paged = yield from _walk_tasks(fetch_page, tasks, seen, executor, per_page, lookahead, max_pages, yielded)
+        if settle is None or not paged:
+            return
+        settle()
+        response = _fetch_task_page(lambda: fetch_page(1))
+        if response is None:
+            return
+        tasks = response.json()
+
+
+def _fetch_task_page(fetch):
+    """fetch()'s response, or None if the request failed."""
+    try:
+        response = fetch()
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch a task page: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"Failed to fetch a task page. Status code: {response.status_code}")
+        return None
+    return response
+
+
+def _walk_tasks(fetch_page, first_page, seen, executor, per_page, lookahead, max_pages, yielded):
+    """One walk of discover_tasks(); returns True if it paged past page 1 and yielded a task."""
+    found = False
+
+    def worth_paging(tasks):
+        return len(tasks) >= per_page and any(
+            task.get("status", "PUBLISHED") == "PUBLISHED"
+            and (seen is None or seen.should_claim(task["id"])) for task in tasks)
+
+    def fresh(tasks):
+        nonlocal found
+        for task in tasks:
+            if task["id"] not in yielded:
+                yielded.add(task["id"])
+                found = True
+                yield task
+
+    # Decide before yielding: the pipeline records outcomes while we wait.
+    more = worth_paging(first_page)
+    yield from fresh(first_page)
+    if not more or executor is None:
+        return False
+
+    pending = deque()
+    next_page = 2
+
+    def launch():
+        nonlocal next_page
+        if next_page <= max_pages:
+            pending.append(executor.submit(fetch_page, next_page))
+            next_page += 1
+
+    for _ in range(lookahead):
+        launch()
+    try:
+        while pending:
+            response = _fetch_task_page(pending.popleft().result)
+            if response is None:
+                return False
+            tasks = response.json()
+            more = worth_paging(tasks)
+            yield from fresh(tasks)
+            if not more:
+                break
+            launch()
+    finally:
+        for future in pending:
+            future.cancel()
+    return found
+
+
+class SeenTaskIndex:
+    """Last claim outcome per task id, with an expiry, kept on disk.
+
+    should_claim() is False while a task's outcome is fresh, so each cycle
+    only spends requests on new tasks and ones whose TTL has run out.
+    Expired entries linger for SEEN_RETENTION so `task_id in index` still
+    tells a task seen before from a new one. Entries are stored compactly as
+    {task_id: [outcome, expires_at]}.
+    """
+
+    def __init__(self, path=SEEN_TASKS_FILE, ttl=None):
+        self.path = path
+        self.ttl = dict(SEEN_TTL, **(ttl or {}))
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                self.tasks = json.load(f)
+        except (OSError, ValueError):
+            self.tasks = {}
+        self.evict()
+
+    def __contains__(self, task_id):
+        return str(task_id) in self.tasks
+
+    def should_claim(self, task_id):
+        entry = self.tasks.get(str(task_id))
+        return entry is None or entry[1] <= time.time()
+
+    def outcome(self, task_id):
+        entry = self.tasks.get(str(task_id))
+        return entry[0] if entry and entry[1] > time.time() else None
+
+    def record(self, task_id, outcome):
+        with self._lock:
+            self.tasks[str(task_id)] = [outcome, round(time.time() + self.ttl[outcome])]
+
+    def evict(self):
+        horizon = time.time() - SEEN_RETENTION
+        with self._lock:
+            self.tasks = {task_id: entry for task_id, entry in self.tasks.items() if entry[1] > horizon}
+
+    def save(self):
+        self.evict()
+        with self._lock:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.tasks, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+
+class ClaimPipeline:
+    """Claims submitted tasks concurrently through claim(client, token, task).
+
+    on_result(task, outcome, response, seconds) is called from the worker
+    thread after every task; outcome is CLAIMED, GONE or ERROR and response
+    is None if the request itself failed. With a SeenTaskIndex, submit()
+    skips tasks whose last outcome is still fresh and every outcome is
+    recorded in it.
+    """
+
+    def __init__(self, client, tokens, claim, workers=CLAIM_WORKERS, on_result=None, seen=None):
+        self.client = client
+        self.tokens = tokens
+        self.claim = claim
+        self.workers = workers
+        self.on_result = on_result or report_claim
+        self.seen = seen
+        self.counts = {CLAIMED: 0, GONE: 0, ERROR: 0}
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, task, priority=None):
+        """Queue task for claiming; False if the seen index says it is not worth a request."""
+        if self.seen is not None and not self.seen.should_claim(task["id"]):
+            return False
+        if priority is None:
+            priority = task_priority(task)
+        self._queue.put((priority, next(self._order), task))
+        return True
+
+    def join(self):
+        """Wait until every submitted task has been claimed or given up on."""
+        self._queue.join()
+
+    def _work(self):
+        while True:
+            _, _, task = self._queue.get()
+            try:
+                self._claim(task)
+            except Exception as e:  # keep the worker alive for the next task
+                print(f"Claim worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _claim(self, task):
+        started = time.monotonic()
+        response = send_with_retries(lambda token: self.claim(self.client, token, task), self.tokens,
+                                     CLAIM_ATTEMPTS, f"Claim request for task {task.get('id')}")
+        if response is not None and response.status_code == 201:
+            outcome = CLAIMED
+        elif response is not None and response.status_code == 412:
+            outcome = GONE
+        else:
+            outcome = ERROR
+        with self._lock:
+            self.counts[outcome] += 1
+        if self.seen is not None:
+            self.seen.record(task["id"], outcome)
+        self.on_result(task, outcome, response, time.monotonic() - started)
+
+
+class CoalescingQueue:
+    """Runs handler(key) on a background thread, once per key however often it is put.
+
+    A key that is already waiting is not queued again, and a key that has
+    been handled is dropped for `ttl` seconds unless forget(key) is called
+    or the handler returned False or raised; side effects such as marking a
+    listing read then cost one request per ttl, off the caller's path.
+    """
+
+    def __init__(self, handler, workers=1, ttl=HANDLED_TTL):
+        self.handler = handler
+        self.workers = workers
+        self.ttl = ttl
+        self._queue = queue.Queue()
+        self._keys = {}  # key: None while waiting, else when it expires
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def put(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._keys = {k: expires for k, expires in self._keys.items() if expires is None or expires > now}
+            if key in self._keys:
+                return False
+            self._keys[key] = None
+        self._queue.put(key)
+        return True
+
+    def forget(self, key):
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def _handled(self, key):
+        with self._lock:
+            if key in self._keys:
+                self._keys[key] = time.monotonic() + self.ttl
+
+    def join(self):
+        self._queue.join()
+
+    def _work(self):
+        while True:
+            key = self._queue.get()
+            try:
+                if self.handler(key) is False:
+                    self.forget(key)
+                else:
+                    self._handled(key)
+            except Exception as e:
+                print(f"Background work for {key} failed: {e}")
+                self.forget(key)
+            finally:
+                self._queue.task_done()
+
+
+def send_with_retries(send, tokens, attempts, what):
+    """Call send(token) until it is answered with neither a 401 nor a 429, at most `attempts` times.
+
+    A 401 refreshes the shared token first; a 429 is retried as is, since the
+    governor holds the retry until Retry-After. Returns the last response, or
+    None if the request itself failed.
+    """
+    token = tokens.get()
+    response = None
+    for _ in range(attempts):
+        try:
+            response = send(token)
+        except requests.exceptions.RequestException as e:
+            print(f"{what} failed: {e}")
+            return None
+        if response.status_code == 401:
+            token = tokens.refresh(stale=token)
+        elif response.status_code != 429:
+            break
+    return response
+
+
+def report_claim(task, outcome, response, seconds):
+    if outcome == CLAIMED:
+        print("Mission claimed successfully.")
+    elif outcome == GONE:
+        print("Mission cannot be claimed anymore.")
+    else:
+        status = response.status_code if response is not None else "no response"
+        print(f"Failed to claim task {task.get('id')}. Status code: {status}")
@@ -0,0 +1,44 @@
+"""Single entry point for the synackDUO tools.
+
+    python3 -m cli <command> [args...]
+
+Each command's module (and so selenium, bs4, Crypto, ...) is imported only
+when that command runs; remaining arguments are passed through to it.
+"""
+import runpy
+import sys
+
+COMMANDS = {
+    "approve": ("main", "Approve Duo pushes (one-shot or --daemon)"),
+    "approve-many": ("multi_approver", "Approve pushes for a directory of device profiles"),
+    "login": ("synconnect_cli", "Log in with requests and save the token"),
+    "login-browser": ("synconnect", "Log in through Firefox and save the token"),
+    "missions": ("missions_auto_register", "Claim missions and register targets (token from file)"),
+    "missions-token": ("mission_bot_token_on_cli", "Claim missions with a token given on the command line"),
+    "missions-beta": ("beta.synbot", "Beta mission bot"),
+    "varpoll": ("var_poll", "Watch registered targets' payout data"),
+    "varmon": ("beta.varmon", "Monitor varpay changes for given targets"),
+}
+
+
+def usage():
+    lines = ["usage: python3 -m cli <command> [args...]", "", "commands:"]
+    lines += [f"  {name:<15} {help}" for name, (_, help) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    if argv[0] not in COMMANDS:
+        print(f"unknown command: {argv[0]}\n\n{usage()}", file=sys.stderr)
+        sys.exit(2)
+    module = COMMANDS[argv[0]][0]
+    sys.argv = [f"cli {argv[0]}"] + argv[1:]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""On-disk cache of the Synack/Duo login cookies, so a run can skip the full login.
+
+Cookies from a requests session or from Selenium are saved with their expiry;
+session cookies without one are kept for SESSION_COOKIE_MAX_AGE. A later run
+loads them into a requests session and tries token_from_cookies() first.
+"""
+import json
+import os
+import time
+
+COOKIE_CACHE_FILE = os.path.expanduser("~/.synack_cookies.json")
+SESSION_COOKIE_MAX_AGE = 12 * 3600  # seconds
+CACHED_LOGIN_URL = "https://login.synack.com/"
+
+
+def save_cookies(cookies, path=COOKIE_CACHE_FILE):
+    """Save a requests cookie jar or a list of Selenium cookie dicts."""
+    now = time.time()
+    records = []
+    for c in cookies:
+        if isinstance(c, dict):
+            expires = c.get("expiry")
+            record = {"name": c["name"], "value": c["value"], "domain": c.get("domain"),
+                      "path": c.get("path", "/"), "secure": c.get("secure", False)}
+        else:
+            expires = c.expires
+            record = {"name": c.name, "value": c.value, "domain": c.domain,
+                      "path": c.path, "secure": c.secure}
+        record["expires"] = expires or now + SESSION_COOKIE_MAX_AGE
+        records.append(record)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(records, f, separators=(",", ":"))
+
+
+def load_cookies(session, path=COOKIE_CACHE_FILE):
+    """Add unexpired cached cookies to session. Returns how many were loaded."""
+    try:
+        with open(path, "r") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    now = time.time()
+    loaded = 0
+    for r in records:
+        if r["expires"] <= now:
+            continue
+        session.cookies.set(r["name"], r["value"], domain=r["domain"], path=r["path"],
+                            secure=r["secure"], expires=int(r["expires"]))
+        loaded += 1
+    return loaded
+
+
+def clear_cookies(path=COOKIE_CACHE_FILE):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def exchange_grant_token(session, grant_token, headers):
+    """Trade a grant_token from the login redirect for a platform access token."""
+    response = session.get(
+        f'https://platform.synack.com/token?grant_token={grant_token}',
+        headers={**headers, 'X-Requested-With': 'XMLHttpRequest'},
+    )
+    try:
+        return response.json().get('access_token')
+    except ValueError:
+        return None
+
+
+def token_from_cookies(session, headers):
+    """Access token from an already-authenticated login session, or None.
+
+    With a live session, login.synack.com redirects straight back to the
+    platform with a grant_token and no credentials or Duo push are needed.
+    """
+    response = session.get(CACHED_LOGIN_URL, headers=headers, allow_redirects=True, timeout=15)
+    if 'grant_token=' not in response.url:
+        return None
+    grant_token = response.url.split('grant_token=')[1].split('&')[0]
+    return exchange_grant_token(session, grant_token, headers)
@@ -0,0 +1,279 @@
+"""Duo Universal Prompt calls shared by the synconnect login flows."""
+import base64
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BROWSER_FEATURES = (
+    '{"touch_supported":false,"platform_authenticator_status":"unavailable",'
+    '"webauthn_supported":true,"screen_resolution_height":1112,'
+    '"screen_resolution_width":1710,"screen_color_depth":30,'
+    '"is_uvpa_available":false,"client_capabilities_uvpa":false}'
+)
+CLIENT_HINTS = base64.b64encode(json.dumps({
+    "brands": [{"brand": "Not-A.Brand", "version": "24"},
+               {"brand": "Chromium", "version": "146"}],
+    "fullVersionList": [], "mobile": False,
+    "platform": "macOS", "platformVersion": "", "uaFullVersion": "",
+}).encode()).decode()
+
+PRECONNECT_TIMEOUT = 5  # seconds
+DEVICE_HISTORY_FILE = "duo_devices.json"
+PRIOR_APPROVE_SECONDS = 30  # assumed approve latency for a device never pushed to
+
+
+def login_session(pool_size=10):
+    """One keep-alive session for every host a login touches."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def preconnect(session, executor, *urls):
+    """Open pooled connections to urls in the background; failures are ignored."""
+    def warm(url):
+        try:
+            session.head(url, allow_redirects=False, timeout=PRECONNECT_TIMEOUT)
+        except requests.exceptions.RequestException:
+            pass
+    return [executor.submit(warm, url) for url in urls]
+
+
+class StepTimer:
+    """Wall time per login step, printed as a summary at the end."""
+
+    def __init__(self):
+        self.steps = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self):
+        for name, seconds in self.steps:
+            print(f"  {name:<24} {seconds * 1000:8.0f} ms")
+        print(f"  {'total':<24} {(time.perf_counter() - self.started) * 1000:8.0f} ms")
+
+
+class DeviceHistory:
+    """Observed approve latency and success rate per push device, kept on disk.
+
+    order() ranks devices by expected time to an approval (mean approve
+    latency divided by smoothed success rate), so pushes go first to the
+    device that historically answers fastest.
+    """
+
+    def __init__(self, path=DEVICE_HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                self.devices = json.load(f)
+        except (OSError, ValueError):
+            self.devices = {}
+
+    def record(self, pkey, approved, seconds=None):
+        with self._lock:
+            d = self.devices.setdefault(pkey, {"attempts": 0, "successes": 0, "seconds": 0.0})
+            d["attempts"] += 1
+            if approved:
+                d["successes"] += 1
+                d["seconds"] += (seconds - d["seconds"]) / d["successes"]
+            self.save()
+
+    def expected_seconds(self, pkey):
+        d = self.devices.get(pkey, {"attempts": 0, "successes": 0, "seconds": 0.0})
+        latency = d["seconds"] if d["successes"] else PRIOR_APPROVE_SECONDS
+        return latency * (d["attempts"] + 2) / (d["successes"] + 1)
+
+    def order(self, pkeys, preferred=()):
+        """pkeys sorted best first; ties (e.g. no history) keep the preferred order."""
+        preferred = list(preferred)
+        rank = {pkey: preferred.index(pkey) if pkey in preferred else len(preferred) for pkey in pkeys}
+        return sorted(pkeys, key=lambda pkey: (self.expected_seconds(pkey), rank[pkey]))
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.devices, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+class DuoPrompt:
+    """The frameless Duo prompt identified by a /prompt/<akey>?authkey=... URL.
+
+    With a DeviceHistory, every push outcome and approve latency is recorded.
+    """
+
+    def __init__(self, session, prompt_url, headers, history=None):
+        parsed = urlparse(prompt_url)
+        if '/prompt/' not in parsed.path:
+            raise RuntimeError(f"Unexpected Duo landing URL: {prompt_url}")
+        self.session = session
+        self.history = history
+        self.base = f"{parsed.scheme}://{parsed.netloc}"
+        self.akey = parsed.path.split('/prompt/')[1].split('/')[0]
+        qs = parse_qs(parsed.query)
+        self.authkey = qs.get('authkey', [None])[0]
+        trace_id = qs.get('req_trace_group', [''])[0]
+        if not self.authkey:
+            raise RuntimeError(f"authkey missing from Duo prompt URL: {prompt_url}")
+        self.headers = {
+            **headers,
+            "Origin": self.base,
+            "Referer": f"{self.base}/prompt/{self.akey}?authkey={self.authkey}"
+                       f"&req_trace_group={trace_id}",
+            "X-Duo-Req-Trace-Group": trace_id,
+        }
+
+    def url(self, path):
+        return f"{self.base}/prompt/{self.akey}/{path}"
+
+    def _json(self, response, name):
+        try:
+            return response.json()
+        except ValueError:
+            raise RuntimeError(f"{name} returned non-JSON: {response.status_code} {response.text[:200]}")
+
+    def payload(self):
+        return self.session.get(
+            self.url("auth/payload"),
+            params={'authkey': self.authkey, 'browser_features': BROWSER_FEATURES},
+            headers=self.headers,
+        )
+
+    def initialization(self):
+        return self.session.get(
+            self.url("pre_authn/initialization"),
+            params={'authkey': self.authkey, 'is_ipad': 'false',
+                    'client_hints': CLIENT_HINTS},
+            headers=self.headers,
+        )
+
+    def evaluation(self):
+        response = self.session.get(
+            self.url("pre_authn/evaluation"),
+            params={'authkey': self.authkey, 'browser_features': BROWSER_FEATURES,
+                    'local_trust_choice': 'undecided'},
+            headers=self.headers,
+        )
+        return self._json(response, "pre_authn/evaluation")
+
+    def preauth(self, executor=None):
+        """payload → initialization → evaluation; returns the enrolled push pkeys.
+
+        With an executor, payload and initialization are sent concurrently;
+        neither depends on the other's response.
+        """
+        if executor is None:
+            self.payload()
+            self.initialization()
+        else:
+            for future in [executor.submit(self.payload), executor.submit(self.initialization)]:
+                future.result()
+        factors = self.evaluation()['response']['available_unified_auth_factors']['factors']
+        return [f['device_info']['pkey'] for f in factors if f.get('factor_type') == 'push']
+
+    def trigger_push(self, pkey):
+        r = self.session.post(
+            self.url("auth/factors/push/auth"),
+            json={'authkey': self.authkey, 'pkey': pkey},
+            headers={**self.headers, "Content-Type": "application/json"},
+        )
+        if r.status_code != 200:
+            raise RuntimeError(f"push/auth failed: {r.status_code} {r.text[:200]}")
+        return self._json(r, "push/auth")['response']['push_txid']
+
+    def push_status(self, txid):
+        r = self.session.get(
+            self.url("auth/factors/push/status"),
+            params={'authkey': self.authkey, 'push_txid': txid,
+                    'saw_good_news': 'false'},
+            headers=self.headers,
+        )
+        if r.status_code != 200:
+            raise RuntimeError(f"push/status failed: {r.status_code} {r.text[:200]}")
+        return self._json(r, "push/status")['response']['result']['result']
+
+    def _record(self, pkey, approved, started=None):
+        if self.history is not None:
+            self.history.record(pkey, approved, started and time.time() - started)
+
+    def push_and_wait(self, pkey, timeout, poll_interval, on_push=None):
+        """Push to one device and poll until it is approved. Returns True on SUCCESS."""
+        started = time.time()
+        txid = self.trigger_push(pkey)
+        if on_push:
+            on_push([txid])
+        deadline = started + timeout
+        while time.time() < deadline:
+            result = self.push_status(txid)
+            if result == 'SUCCESS':
+                self._record(pkey, True, started)
+                return True
+            if result != 'STATUS':
+                break
+            time.sleep(poll_interval)
+        self._record(pkey, False)
+        return False
+
+    def push_fanout(self, pkeys, timeout, poll_interval, executor, on_push=None):
+        """Push to every device at once and poll them together; the first SUCCESS wins.
+
+        Returns the approving pkey, or None. Pushes still pending when one
+        succeeds are abandoned and expire on the devices.
+        """
+        def trigger(pkey):
+            try:
+                return self.trigger_push(pkey)
+            except (RuntimeError, requests.exceptions.RequestException) as e:
+                print(f"Push to device {pkey} failed: {e}")
+                return None
+
+        def status(item):
+            pkey, txid = item
+            try:
+                return self.push_status(txid)
+            except (RuntimeError, requests.exceptions.RequestException) as e:
+                print(f"Status check for device {pkey} failed: {e}")
+                return None  # dropped from pending below
+
+        started = time.time()
+        pending = {pkey: txid for pkey, txid in zip(pkeys, executor.map(trigger, pkeys)) if txid}
+        if on_push and pending:
+            on_push(list(pending.values()))
+        deadline = started + timeout
+        while pending and time.time() < deadline:
+            results = executor.map(status, list(pending.items()))
+            for pkey, result in list(zip(pending, results)):
+                if result == 'SUCCESS':
+                    self._record(pkey, True, started)
+                    return pkey
+                if result != 'STATUS':
+                    self._record(pkey, False)
+                    del pending[pkey]
+            time.sleep(poll_interval)
+        for pkey in pending:
+            self._record(pkey, False)
+        return None
+
+    def finalize(self):
+        """Returns the exit URL that leads back to the relying party."""
+        response = self.session.get(
+            self.url("auth/finalize_auth"),
+            params={'authkey': self.authkey}, headers=self.headers,
+        )
+        return self._json(response, "finalize_auth")['response']['url']
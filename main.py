@@ -1,8 +1,11 @@
+import argparse
+import os
 import time
 import pathlib
-from Crypto.PublicKey import RSA
-from Crypto.Signature import pkcs1_15
-from Crypto.Hash import SHA512
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 import urllib.parse
@@ -11,26 +14,126 @@ import base64
 import datetime
 import email.utils
 import json
-import urllib3
-
-import requests
 
 from urllib.parse import urlparse
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-# Handle ssl errors and warnings
+# requests/urllib3 and pycryptodome are imported where they are first needed:
+# loading a device from the state file uses neither, which keeps the
+# approver's cold start short (see bench/bench_startup.py).
+
+DEFAULT_TIMEOUT = (5, 15)  # (connect, read) seconds
+DEFAULT_POOL_SIZE = 10
+DEVICE_API_VERIFY = False  # the signed /push/v2/device calls have always skipped certificate checks
+STATE_FILE = "duo_state.json"  # key + activation response in one file
+DAEMON_SOCKET = "/tmp/synackduo.sock"
+IDLE_POLL_INTERVAL = 10  # seconds between polls when no push is expected
+BURST_POLL_INTERVAL = 0.25  # seconds between polls while a push is expected
+BURST_DURATION = 60  # seconds to keep bursting after an EXPECT
+
+
+class PycryptodomeBackend:
+    """RSA PKCS#1 v1.5 / SHA-512 via pycryptodome, the signer built once per key."""
+    name = "pycryptodome"
+
+    def __init__(self, key):
+        from Crypto.Hash import SHA512
+        from Crypto.Signature import pkcs1_15
+
+        self._signer = pkcs1_15.new(key)
+        self._hash = SHA512
+
+    def sign(self, message):
+        return self._signer.sign(self._hash.new(message))
+
+
+class CryptographyBackend:
+    """Same signature through OpenSSL, via the optional `cryptography` package."""
+    name = "cryptography"
+
+    def __init__(self, key):
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        self._key = serialization.load_der_private_key(key.export_key("DER"), password=None)
+        self._padding = padding.PKCS1v15()
+        self._hash = hashes.SHA512()
+
+    def sign(self, message):
+        return self._key.sign(message, self._padding, self._hash)
+
+
+SIGNER_BACKENDS = {
+    PycryptodomeBackend.name: PycryptodomeBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+
+class RequestSigner:
+    """Builds Duo device Authorization headers for one key/pkey/host."""
+
+    def __init__(self, key, pkey, host, backend="pycryptodome"):
+        self.backend = SIGNER_BACKENDS[backend](key)
+        self.host = host.lower()
+        self._prefix = pkey.encode("ascii") + b":"
+
+    def canonicalize(self, method, path, time, data):
+        return "\n".join((time, method, self.host, path, urllib.parse.urlencode(data))).encode("ascii")
+
+    def sign(self, method, path, time, data):
+        signature = self.backend.sign(self.canonicalize(method, path, time, data))
+        return "Basic " + base64.b64encode(self._prefix + base64.b64encode(signature)).decode("ascii")
+
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, verify=True):
+    """Keep-alive session with a connection pool sized for concurrent replies.
+
+    Certificates are verified unless verify=False; the device API calls opt
+    out per request (see DEVICE_API_VERIFY), activation does not.
+    """
+    import requests
+    import urllib3
+    from requests.adapters import HTTPAdapter
+
+    # Suppress only the InsecureRequestWarning the unverified device API calls raise.
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = verify
+    return session
+
 
 class Client:
-    def __init__(self, akey=None, pkey=None, host=None, code=None, response=None, keyfile=None):
+    def __init__(self, akey=None, pkey=None, host=None, code=None, response=None, keyfile=None,
+                 session=None, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, base_url=None,
+                 signer_backend="pycryptodome", executor=None):
+        # The key is generated on first use only; loading an existing
+        # device never pays for RSA.generate, and a key from the state file
+        # is only parsed when the first request is signed.
+        self._pubkey = None
+        self._key_pem = None
         if keyfile:
             self.import_key(keyfile)
-        else:
-            self.pubkey = RSA.generate(2048)
 
         self.pkey = pkey
         self.akey = akey
         self.host = host
         self.info = {}
 
+        # One pooled transport per client so polls and the approval POST reuse
+        # the same warm connection. base_url points the client at a local
+        # stand-in server (see bench/stub_duo.py) while still signing for host.
+        self._session = session
+        self.pool_size = pool_size
+        # Reply workers; may be shared by several clients (see multi_approver.py).
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.timeout = timeout
+        self.base_url = base_url
+
+        self.signer_backend = signer_backend
+        self._signer = None
+
         if code:
             self.read_code(code)
         if response:
@@ -42,7 +145,74 @@ class Client:
     def __repr__(self) -> str:
         return "Client("+",".join([(self.__dict__[i] or '') and (i+'='+self.__dict__[i]) for i in ["akey", "pkey", "host"]])+")"
 
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = make_session(self.pool_size)
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def url(self, path):
+        return (self.base_url or f"https://{self.host}") + path
+
+    def close(self):
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+    @classmethod
+    def load(cls, state=STATE_FILE, keyfile="key.pem", response="response.json", **kwargs):
+        """Client for an activated device, or None if there is nothing to load.
+
+        Reads the cached state file; a legacy key.pem/response.json pair is
+        migrated into it on first load.
+        """
+        if pathlib.Path(state).is_file():
+            c = cls(**kwargs)
+            c.import_state(state)
+            return c
+        if pathlib.Path(keyfile).is_file() and pathlib.Path(response).is_file():
+            c = cls(keyfile=keyfile, response=response, **kwargs)
+            c.export_state(state)
+            return c
+        return None
+
+    @property
+    def pubkey(self):
+        if self._pubkey is None:
+            from Crypto.PublicKey import RSA
+
+            if self._key_pem is not None:
+                self._pubkey = RSA.import_key(self._key_pem)
+            else:
+                self._pubkey = RSA.generate(2048)
+        return self._pubkey
+
+    @pubkey.setter
+    def pubkey(self, key):
+        self._pubkey = key
+
+    def import_state(self, state=STATE_FILE):
+        with open(state, "r") as f:
+            data = json.load(f)
+        self._pubkey, self._key_pem = None, data["key"]
+        self.import_response(data["response"])
+
+    def export_state(self, state=STATE_FILE):
+        if self.host and ("host" not in self.info or not self.info["host"]):
+            self.info["host"] = self.host
+        data = {"key": self.pubkey.export_key("PEM").decode("ascii"), "response": self.info}
+        fd = os.open(state, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+
     def import_key(self, keyfile):
+        from Crypto.PublicKey import RSA
+
         if issubclass(type(keyfile), io.IOBase):
             self.pubkey = RSA.import_key(keyfile.read())
         else:
@@ -94,8 +264,8 @@ class Client:
             params = {"customer_protocol": "1", "pubkey": self.pubkey.publickey().export_key("PEM").decode('ascii'), "pkpush": "rsa-sha512", "jailbroken": "false", "architecture": "arm64", "region": "US", "app_id": "com.duosecurity.duomobile", "full_disk_encryption": "true",
                       "passcode_status": "true", "platform": "Android", "app_version": "4.108.0", "app_build_number": "410820", "version": "11", "manufacturer": "unknown", "language": "en", "model": "Browser Extension", "security_patch_level": "2026-02-01"}
             # send activation request
-            r = requests.post(
-                f"https://{self.host}/push/v2/activation/{self.code}", params=params)
+            r = self.session.post(
+                self.url(f"/push/v2/activation/{self.code}"), params=params, timeout=self.timeout)
             # print(r.request.url)
 
             response = r.json()
@@ -103,33 +273,33 @@ class Client:
         else:
             raise ValueError("Code is null")
 
-    def generate_signature(self, method, path, time, data):
-        message = (time + "\n" + method + "\n" + self.host.lower() + "\n" +
-                   path + '\n' + urllib.parse.urlencode(data)).encode('ascii')
-        print(message)
+    @property
+    def signer(self):
+        # Rebuilt only when the key, pkey or host changes (import_key, activate).
+        identity = (id(self.pubkey), self.pkey, self.host, self.signer_backend)
+        if self._signer is None or self._signer_identity != identity:
+            self._signer = RequestSigner(self.pubkey, self.pkey, self.host, self.signer_backend)
+            self._signer_identity = identity
+        return self._signer
 
-        h = SHA512.new(message)
-        signature = pkcs1_15.new(self.pubkey).sign(h)
-        auth = ("Basic "+base64.b64encode((self.pkey + ":" +
-                base64.b64encode(signature).decode('ascii')).encode('ascii')).decode('ascii'))
-        return auth
+    def generate_signature(self, method, path, time, data):
+        return self.signer.sign(method, path, time, data)
 
-    def get_transactions(self):
+    def signed_headers(self, method, path, data):
         dt = datetime.datetime.utcnow()
         time = email.utils.format_datetime(dt)
+        signature = self.generate_signature(method, path, time, data)
+        return {"Authorization": signature, "x-duo-date": time, "host": self.host}
+
+    # The *_request builders hold the protocol details (path, form data,
+    # signed headers) shared by Client and async_client.AsyncClient.
+    def transactions_request(self):
         path = "/push/v2/device/transactions"
         data = {"akey": self.akey, "fips_status": "1",
                 "hsm_status": "true", "pkpush": "rsa-sha512"}
+        return path, data, self.signed_headers("GET", path, data)
 
-        signature = self.generate_signature("GET", path, time, data)
-        r = requests.get(f"https://{self.host}{path}", params=data, verify=False, headers={
-                         "Authorization": signature, "x-duo-date": time, "host": self.host})
-
-        return r.json()
-
-    def reply_transaction(self, transactionid, answer):
-        dt = datetime.datetime.utcnow()
-        time = email.utils.format_datetime(dt)
+    def reply_request(self, transactionid, answer):
         path = "/push/v2/device/transactions/"+transactionid
         data = {"akey": self.akey, "answer": answer, "fips_status": "1",
                 "hsm_status": "true", "pkpush": "rsa-sha512"}
@@ -138,57 +308,262 @@ class Client:
         #     data["touch_id"] = False
         # data["push_received"] = True
         # data["pull_to_refresh_used"] = True
-        signature = self.generate_signature("POST", path, time, data)
-        r = requests.post(f"https://{self.host}{path}", data=data, verify=False, headers={
-                          "Authorization": signature, "x-duo-date": time, "host": self.host, "txId": transactionid})
+        headers = self.signed_headers("POST", path, data)
+        headers["txId"] = transactionid
+        return path, data, headers
+
+    def info_request(self):
+        path = "/push/v2/device/info"
+        data = {"akey": self.akey, "fips_status": "1",
+                "hsm_status": "true", "pkpush": "rsa-sha512"}
+        return path, data, self.signed_headers("GET", path, data)
 
+    def get_transactions(self):
+        path, data, headers = self.transactions_request()
+        r = self.session.get(self.url(path), params=data, timeout=self.timeout, headers=headers,
+                             verify=DEVICE_API_VERIFY)
+        return r.json()
+
+    def reply_transaction(self, transactionid, answer):
+        path, data, headers = self.reply_request(transactionid, answer)
+        r = self.session.post(self.url(path), data=data, timeout=self.timeout, headers=headers,
+                              verify=DEVICE_API_VERIFY)
         return r.json()
 
+    def reply_transactions(self, transactions, answer):
+        """Answer every transaction concurrently over the pooled session.
+
+        Returns one record per transaction with its reply time in seconds
+        and either the parsed response or the error.
+        """
+        import requests
+
+        def reply(tx):
+            start = time.perf_counter()
+            try:
+                record = {"response": self.reply_transaction(tx["urgid"], answer)}
+            except (requests.exceptions.RequestException, ValueError) as e:
+                record = {"error": e}
+            record.update(urgid=tx["urgid"], seconds=time.perf_counter() - start)
+            return record
+
+        if len(transactions) == 1:
+            return [reply(transactions[0])]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size)
+        return list(self._executor.map(reply, transactions))
+
     def register(self, token):
-        dt = datetime.datetime.utcnow()
-        time = email.utils.format_datetime(dt)
         path = "/push/v2/device/registration"
         data = {"akey": self.akey, "token": token}
+        r = self.session.post(self.url(path), data=data, timeout=self.timeout,
+                              headers=self.signed_headers("POST", path, data), verify=DEVICE_API_VERIFY)
 
-
-        # if answer == "approve":
-        #     data["touch_id"] = False
-        # data["push_received"] = True
-        # data["pull_to_refresh_used"] = True
-        signature = self.generate_signature("POST", path, time, data)
-        r = requests.post(f"https://{self.host}{path}", data=data, verify=False, headers={
-                          "Authorization": signature, "x-duo-date": time, "host": self.host})
     def device_info(self):
-        dt = datetime.datetime.utcnow()
-        time = email.utils.format_datetime(dt)
-        path = "/push/v2/device/info"
-        data = {"akey": self.akey, "fips_status": "1",
-                "hsm_status": "true", "pkpush": "rsa-sha512"}
-
-        signature = self.generate_signature("GET", path, time, data)
-        r = requests.get(f"https://{self.host}{path}", params=data, verify=False, headers={
-                         "Authorization": signature, "x-duo-date": time, "host": self.host})
+        path, data, headers = self.info_request()
+        r = self.session.get(self.url(path), params=data, timeout=self.timeout, headers=headers,
+                             verify=DEVICE_API_VERIFY)
         return r.json()
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def load_client(state=STATE_FILE):
+    """Process-wide Client for the activated device, loaded once and kept warm."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            c = Client.load(state)
+            if c is None or not c.host:
+                raise RuntimeError("Duo device is not activated; run main.py once to activate it")
+            _client = c
+        return _client
+
+
+def pending_transactions(client):
+    """The device's pending transactions; ValueError if Duo answered FAIL or not JSON."""
+    reply = client.get_transactions()
+    if not isinstance(reply, dict) or reply.get("stat") != "OK":
+        raise ValueError(f"Duo transactions request failed: {reply}")
+    return reply["response"]["transactions"]
+
+
+def approve_pending(timeout=60, poll_interval=0.5, client=None, answer="approve"):
+    """Answer all pending transactions, waiting at most timeout seconds for one.
+
+    Returns the reply records from Client.reply_transactions, or an empty
+    list if nothing arrived.
+    """
+    import requests
+
+    c = client or load_client()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            transactions = pending_transactions(c)
+        except requests.exceptions.ConnectionError:
+            print("Connection Error")
+            transactions = []
+        except (requests.exceptions.RequestException, KeyError, TypeError, ValueError) as e:
+            # A timeout or a FAIL body must not end the wait for the push
+            print(f"Polling Duo transactions failed: {e}")
+            transactions = []
+        if transactions:
+            return c.reply_transactions(transactions, answer)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return []
+        time.sleep(min(poll_interval, remaining))
+
+
+def report_replies(records, prefix=""):
+    for record in records:
+        outcome = f"failed: {record['error']}" if "error" in record else "answered"
+        print(f"{prefix}Transaction {record['urgid']} {outcome} in {record['seconds'] * 1000:.0f} ms")
+
+
+def approve_in_background(timeout=60, **kwargs):
+    """Run approve_pending on a daemon thread so the caller can poll push status meanwhile."""
+    t = threading.Thread(target=approve_pending, kwargs=dict(timeout=timeout, **kwargs), daemon=True)
+    t.start()
+    return t
+
+
+class ApproverDaemon:
+    """Resident approver: idles at a cheap poll rate, bursts when told a push is coming.
+
+    Login flows send "EXPECT <txid>" over the Unix socket. Duo's device-side
+    urgid is not the prompt's push_txid, so the txid is only a label: the
+    burst ends once as many transactions have been answered as were
+    expected, or after BURST_DURATION.
+    """
+
+    def __init__(self, client, socket_path=DAEMON_SOCKET, idle_interval=IDLE_POLL_INTERVAL,
+                 burst_interval=BURST_POLL_INTERVAL, burst_duration=BURST_DURATION, answer="approve"):
+        self.client = client
+        self.socket_path = socket_path
+        self.idle_interval = idle_interval
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.answer = answer
+        self.answered = 0
+        self._expected = []
+        self._burst_until = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._server = None
+
+    def expect(self, txid=""):
+        with self._lock:
+            self._expected.append(txid)
+            self._burst_until = time.monotonic() + self.burst_duration
+        self._wake.set()
+
+    def bursting(self):
+        with self._lock:
+            return bool(self._expected) and time.monotonic() < self._burst_until
+
+    def status(self):
+        with self._lock:
+            return {"expected": list(self._expected), "answered": self.answered,
+                    "bursting": bool(self._expected) and time.monotonic() < self._burst_until}
+
+    def poll_once(self):
+        transactions = pending_transactions(self.client)
+        if transactions:
+            report_replies(self.client.reply_transactions(transactions, self.answer))
+        with self._lock:
+            self.answered += len(transactions)
+            del self._expected[:len(transactions)]
+            if time.monotonic() >= self._burst_until:
+                self._expected.clear()
+        return transactions
+
+    def serve_socket(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                command, _, arg = self.rfile.readline().decode().strip().partition(" ")
+                if command == "EXPECT":
+                    daemon.expect(arg)
+                    reply = "OK"
+                elif command == "PING":
+                    reply = "OK"
+                elif command == "STATUS":
+                    reply = json.dumps(daemon.status())
+                else:
+                    reply = "ERR unknown command"
+                self.wfile.write((reply + "\n").encode())
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def run(self):
+        import requests
+
+        self.serve_socket()
+        print(f"Approver daemon listening on {self.socket_path}")
+        try:
+            while True:
+                try:
+                    self.poll_once()
+                except requests.exceptions.RequestException as e:
+                    print(f"Connection Error: {e}")
+                except (KeyError, TypeError, ValueError) as e:
+                    # A FAIL or malformed reply; the daemon keeps serving and polling
+                    print(f"Unexpected Duo reply: {e}")
+                self._wake.wait(self.burst_interval if self.bursting() else self.idle_interval)
+                self._wake.clear()
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            os.unlink(self.socket_path)
+
+
+def daemon_command(command, socket_path=DAEMON_SOCKET, timeout=1.0):
+    """Send one command to a running ApproverDaemon; None if none is listening."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(socket_path)
+            s.sendall((command + "\n").encode())
+            return s.makefile().readline().strip()
+    except OSError:
+        return None
+
+
+def prepare_approver(socket_path=DAEMON_SOCKET):
+    """Ready an approver before a login. True if a daemon will handle pushes."""
+    if daemon_command("PING", socket_path) == "OK":
+        return True
+    load_client()
+    return False
+
+
+def request_approval(txid="", timeout=60, socket_path=DAEMON_SOCKET):
+    """Get a just-triggered push approved, through the daemon if one is listening."""
+    if daemon_command(f"EXPECT {txid}", socket_path) == "OK":
+        return None
+    return approve_in_background(timeout=timeout)
+
+
 # c = Client(response="response.json",keyfile="mykey.pem",code="")
 # print(c)
 # #print(c.get_transactions())
 # print(c.reply_transaction("","approve"))
 
 
-def main():
+def setup_client():
     code = ""
     host = ""
-    c = Client()
-    key_exists = False
-    if pathlib.Path("key.pem").is_file():
-        c.import_key("key.pem")
-        key_exists = True
-    else:
-        c.export_key("key.pem")
-
-    if pathlib.Path("response.json").is_file() and key_exists:
-        c.import_response("response.json")
+    c = Client.load()
+    if c is not None:
         if code:
             c.read_code(code)
         if not c.host and host:
@@ -196,13 +571,38 @@ def main():
         if not c.host:
             code = input("Input code:")
             c.read_code(code)
-            c.export_response()
+            c.export_state()
     else:
+        # Not activated yet: reuse an existing key.pem, otherwise generate one.
+        if pathlib.Path("key.pem").is_file():
+            c = Client(keyfile="key.pem")
+        else:
+            c = Client()
+            c.export_key("key.pem")
         if not code:
             code = input("Input code:")
         c.read_code(code)
         c.activate()
         c.export_response()
+        c.export_state()
+    return c
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approve Synack Duo pushes.")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Stay resident and accept EXPECT commands on a Unix socket")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Daemon socket path")
+    parser.add_argument("--idle-interval", type=float, default=IDLE_POLL_INTERVAL,
+                        help="Seconds between polls when no push is expected")
+    args = parser.parse_args()
+
+    import requests
+
+    c = setup_client()
+    if args.daemon:
+        ApproverDaemon(c, socket_path=args.socket, idle_interval=args.idle_interval).run()
+        return
 
     while True:
         try:
@@ -217,9 +617,8 @@ def main():
         if len(t):
             for tx in t:
                 print(tx)
-                c.reply_transaction(tx["urgid"], 'approve')
-                time.sleep(2)
-                exit()
+            report_replies(c.reply_transactions(t, 'approve'))
+            exit()
         else:
             print("No transactions")
 
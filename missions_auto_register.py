@@ -1,108 +1,125 @@
 import requests
-import time
-import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 
-# Suppress only the single InsecureRequestWarning from urllib3 needed for `verify=False`.
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from claims import PAGE_LOOKAHEAD, TASK_PAGE_SIZE, ClaimPipeline, SeenTaskIndex, discover_tasks
+from platform_client import PlatformClient
+from poll_scheduler import target_scheduler, task_scheduler
+from targets import SignupPool, TargetStore, discover_targets, unregistered_targets_path
+from token_manager import TokenHolder
 
 def read_token_from_file(file_path):
     """Reads the JWT token from the specified file."""
     with open(file_path, 'r') as file:
         return file.read().strip()
 
-def get_task(token, proxies):
+def get_task(client, token, page=1):
     """Performs GET request to retrieve tasks."""
-    url = "https://platform.synack.com/api/tasks/v2/tasks"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
     params = {
-        "perPage": 20,
+        "perPage": TASK_PAGE_SIZE,
         "viewed": "true",
-        "page": 1,
+        "page": page,
         "status": "PUBLISHED",
         "sort": "CLAIMABLE",
         "sortDir": "DESC",
         "includeAssignedBySynackUser": "false"
     }
-    response = requests.get(url, headers=headers, params=params, proxies=proxies, verify=False)
+    response = client.get("/api/tasks/v2/tasks", token, params=params)
     return response
 
-def post_claim_task(token, task_info, proxies):
+def post_claim_task(client, token, task_info):
     """Performs POST request to claim a specific task."""
-    url = f"https://platform.synack.com/api/tasks/v1/organizations/{task_info['organizationUid']}/listings/{task_info['listingUid']}/campaigns/{task_info['campaignUid']}/tasks/{task_info['id']}/transitions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
+    path = f"/api/tasks/v1/organizations/{task_info['organizationUid']}/listings/{task_info['listingUid']}/campaigns/{task_info['campaignUid']}/tasks/{task_info['id']}/transitions"
     payload = {"type": "CLAIM"}
-    response = requests.post(url, json=payload, headers=headers, proxies=proxies, verify=False)
+    response = client.post(path, token, json=payload)
     return response
 
-def poll_unregistered_targets(token, proxies, known_slugs):
-    """Polls for unregistered targets every 5 minutes and signs up for new ones."""
+def poll_unregistered_targets(client, tokens, store, schedule, signups):
+    """Polls for unregistered targets on the learned schedule (5 minutes on average) and signs up for new ones."""
     while True:
-        url = "https://platform.synack.com/api/targets?filter%5Bprimary%5D=unregistered&filter%5Bsecondary%5D=all&filter%5Bcategory%5D=all&filter%5Bindustry%5D=all&filter%5Bpayout_status%5D=all&sorting%5Bfield%5D=onboardedAt&sorting%5Bdirection%5D=desc&pagination%5Bpage%5D=1&pagination%5Bper_page%5D=15"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        response = requests.get(url, headers=headers, proxies=proxies, verify=False)
+        new_targets = 0
+        token = tokens.get()
+        try:
+            response = client.get(unregistered_targets_path(), token)
+        except requests.exceptions.RequestException as e:
+            print(f"Target poll failed: {e}")
+            schedule.wait()
+            continue
         if response.status_code == 200:
-            targets = response.json()
-            for target in targets:
-                slug = target['slug']
-                if slug not in known_slugs:
-                    known_slugs.add(slug)
-                    signup_target(token, slug, proxies)
+            # Follows later pages until it reaches targets older than the ones already walked
+            # and only then signs up, concurrently: a signup takes its target off the paged list
+            signed = []
+            for target in discover_targets(lambda page: client.get(unregistered_targets_path(page), token),
+                                           response.json(), store):
+                if not store.retrying(target["slug"]):
+                    new_targets += 1
+                signed.append(signups.submit(target))
+            # Outcomes are recorded in the store as signups finish; failed ones are retried later
+            signups.wait(signed)
+            store.save()
+        elif response.status_code == 401:
+            tokens.refresh(stale=token)
         else:
             print(f"Failed to retrieve unregistered targets. Status code: {response.status_code}")
-        time.sleep(300)  # Poll every 5 minutes
+        schedule.observe(new_targets)
+        schedule.wait()
 
-def signup_target(token, slug, proxies):
+def signup_target(client, token, slug):
     """Performs POST request to sign up for a target using its slug."""
-    url = f"https://platform.synack.com/api/targets/{slug}/signup"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
     payload = {"ResearcherListing": {"terms": 1}}
-    response = requests.post(url, json=payload, headers=headers, proxies=proxies, verify=False)
-    if response.status_code == 200:
-        print(f"Signed up for target {slug} successfully.")
-    else:
-        print(f"Failed to sign up for target {slug}. Status code: {response.status_code}, Response: {response.text}")
+    return client.post(f"/api/targets/{slug}/signup", token, json=payload)
 
 def main():
     token_file_path = '/tmp/synacktoken'
-    token = read_token_from_file(token_file_path)
+    # Follows every token published to the file, so a refresh reaches both threads at once
+    tokens = TokenHolder(read_token_from_file(token_file_path),
+                         refresher=lambda: read_token_from_file(token_file_path)).watch_file(token_file_path)
     proxies = {
         # "http": "http://yourproxyaddress:port",
         # "https": "http://yourproxyaddress:port",
     }
-    known_slugs = set()  # To track known slugs and avoid duplicate sign-ups if ever.
+    store = TargetStore()  # Watermark + known slugs, kept on disk so restarts don't sign up again.
+    # One pooled session for both threads, kept warm between poll cycles
+    client = PlatformClient(proxies).start_warming()
+    # Claims run concurrently, best payout first, paced by the client's rate governor;
+    # tasks that were just claimed or answered 412 are skipped until their TTL runs out
+    seen = SeenTaskIndex()
+    task_schedule = task_scheduler()
+    # Later task pages are fetched concurrently while page 1 is being claimed
+    pages = ThreadPoolExecutor(max_workers=PAGE_LOOKAHEAD)
+    pipeline = ClaimPipeline(client, tokens, post_claim_task, seen=seen).start()
+
+    # New targets are signed up a few at a time on the shared client
+    signups = SignupPool(client, tokens, signup_target, store=store)
 
     # Start the thread for polling unregistered targets
-    target_thread = Thread(target=poll_unregistered_targets, args=(token, proxies, known_slugs))
+    target_thread = Thread(target=poll_unregistered_targets, args=(client, tokens, store, target_scheduler(), signups))
     target_thread.start()
 
     while True:
-        get_response = get_task(token, proxies)
-        if get_response.status_code == 200:
-            tasks = get_response.json()
-            for task in tasks:
-                post_response = post_claim_task(token, task, proxies)
-                if post_response.status_code == 201:
-                    print("Mission claimed successfully.")
-                elif post_response.status_code == 412:
-                    print("Mission cannot be claimed anymore.")
-                    break
-                time.sleep(5)
+        new_tasks = 0
+        token = tokens.get()
+        try:
+            get_response = get_task(client, token)
+        except requests.exceptions.RequestException as e:
+            print(f"Task poll failed: {e}")
+            task_schedule.wait()
+            continue
+        if get_response.status_code == 401:
+            tokens.refresh(stale=token)
+        elif get_response.status_code == 200:
+            for task in discover_tasks(lambda page: get_task(client, token, page), get_response.json(),
+                                       seen=seen, executor=pages, settle=pipeline.join):
+                if task["id"] not in seen:  # not a resubmit whose seen entry has expired
+                    new_tasks += 1
+                pipeline.submit(task)
+            pipeline.join()
+            seen.save()
         else:
             print(f"Failed to retrieve tasks. Status code: {get_response.status_code}")
-        time.sleep(30)
+        # Polls densely around the hours tasks usually appear, and in bursts right after one does
+        task_schedule.observe(new_tasks)
+        task_schedule.wait()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,127 @@
+"""Approve Duo pushes for several devices/accounts from one process.
+
+Each *.json file in the profiles directory is a device state file as written
+by main.py (Client.export_state). Devices on the same Duo host share one
+pooled session, and one scheduler polls all of them on shared worker pools.
+"""
+import argparse
+import json
+import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from main import DEFAULT_POOL_SIZE, IDLE_POLL_INTERVAL, Client, make_session, report_replies
+
+PROFILES_DIR = "profiles"
+
+
+class DeviceStats:
+    def __init__(self, name):
+        self.name = name
+        self.polls = 0
+        self.errors = 0
+        self.answered = 0
+        self.poll_seconds = 0.0  # running mean
+        self.reply_seconds = 0.0  # running mean
+
+    def record_poll(self, seconds):
+        self.polls += 1
+        self.poll_seconds += (seconds - self.poll_seconds) / self.polls
+
+    def record_replies(self, records):
+        for record in records:
+            if "error" in record:
+                self.errors += 1
+                continue
+            self.answered += 1
+            self.reply_seconds += (record["seconds"] - self.reply_seconds) / self.answered
+
+    def __str__(self):
+        return (f"{self.name}: {self.polls} polls, mean {self.poll_seconds * 1000:.0f} ms; "
+                f"{self.answered} answered, mean {self.reply_seconds * 1000:.0f} ms; {self.errors} errors")
+
+
+class MultiApprover:
+    def __init__(self, profiles_dir=PROFILES_DIR, interval=IDLE_POLL_INTERVAL, workers=8,
+                 pool_size=DEFAULT_POOL_SIZE, answer="approve"):
+        self.interval = interval
+        self.answer = answer
+        self.sessions = {}
+        self.poll_executor = ThreadPoolExecutor(max_workers=workers)
+        self.reply_executor = ThreadPoolExecutor(max_workers=workers)
+        self.pool_size = pool_size
+        self.devices = {}
+        self.stats = {}
+        for path in sorted(pathlib.Path(profiles_dir).glob("*.json")):
+            self.add_device(path.stem, path)
+
+    def session_for(self, host):
+        if host not in self.sessions:
+            self.sessions[host] = make_session(self.pool_size)
+        return self.sessions[host]
+
+    def add_device(self, name, state, base_url=None):
+        with open(state, "r") as f:
+            host = json.load(f)["response"]["host"]
+        c = Client(session=self.session_for(host), executor=self.reply_executor, base_url=base_url)
+        c.import_state(state)
+        self.devices[name] = c
+        self.stats[name] = DeviceStats(name)
+
+    def poll_device(self, name):
+        c = self.devices[name]
+        stats = self.stats[name]
+        start = time.perf_counter()
+        try:
+            transactions = c.get_transactions()["response"]["transactions"]
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            stats.errors += 1
+            print(f"[{name}] poll failed: {e}")
+            return
+        stats.record_poll(time.perf_counter() - start)
+        if transactions:
+            records = c.reply_transactions(transactions, self.answer)
+            stats.record_replies(records)
+            report_replies(records, prefix=f"[{name}] ")
+
+    def poll_all(self):
+        list(self.poll_executor.map(self.poll_device, self.devices))
+
+    def report(self):
+        for stats in self.stats.values():
+            print(stats)
+
+    def run(self, report_every=30):
+        print(f"Polling {len(self.devices)} devices on {len(self.sessions)} Duo hosts")
+        cycle = 0
+        while True:
+            started = time.monotonic()
+            self.poll_all()
+            cycle += 1
+            if report_every and cycle % report_every == 0:
+                self.report()
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approve Duo pushes for every device profile in a directory.")
+    parser.add_argument("profiles", nargs="?", default=PROFILES_DIR,
+                        help="Directory of device state files (default: ./profiles)")
+    parser.add_argument("--interval", type=float, default=IDLE_POLL_INTERVAL, help="Seconds between poll cycles")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent polls/replies across all devices")
+    parser.add_argument("--report-every", type=int, default=30, help="Print per-device latency every N cycles")
+    args = parser.parse_args()
+
+    approver = MultiApprover(args.profiles, interval=args.interval, workers=args.workers)
+    if not approver.devices:
+        parser.error(f"no device profiles found in {args.profiles}")
+    try:
+        approver.run(report_every=args.report_every)
+    except KeyboardInterrupt:
+        approver.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Pooled, pre-warmed HTTP client for platform.synack.com, shared by a bot's threads.
+
+The bots used to call requests.get/post per request, paying DNS, TCP and TLS
+setup on every claim. One PlatformClient keeps a connection pool to the
+platform, builds headers once per token and, between poll cycles, keeps
+connections warm so the next claim goes out on an open socket.
+
+Every request also passes through the client's RateGovernor, so task polls,
+claims, target polls and mark-read calls draw on one request budget.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+# Suppress only the single InsecureRequestWarning from urllib3 needed for `verify=False`.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+PLATFORM_URL = "https://platform.synack.com"
+DEFAULT_POOL_SIZE = 10
+WARM_CONNECTIONS = 2  # connections kept open for claims racing each other
+WARM_INTERVAL = 20  # seconds; well inside typical 60 s keep-alive timeouts
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds
+
+INITIAL_RATE = 2.0  # requests per second until the platform says otherwise
+MIN_RATE = 0.1
+MAX_RATE = 10.0
+RATE_BURST = 10  # requests allowed back to back after an idle spell, e.g. a batch of signups
+RATE_STEP = 0.05  # req/s regained per successful response, up to the ceiling
+RATE_PROBE = 0.005  # req/s gained per successful response at the ceiling, to find it again
+RATE_BACKOFF = 0.5  # rate multiplier on every 429
+DEFAULT_RETRY_AFTER = 15  # seconds, when a 429 carries no usable Retry-After
+
+
+def retry_after(response):
+    """Seconds the server asked us to wait, from a Retry-After header, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateGovernor:
+    """Token bucket shared by every request a bot makes.
+
+    acquire() blocks until a request may go out. observe() learns from the
+    response: a 429 halves the rate and holds all requests until its
+    Retry-After has passed, and further 429s before then only extend the
+    hold, since they were in flight when the first arrived. Other responses
+    win the rate back a little at a time. Recovery stops short at `ceiling`,
+    the rate the last backoff started from, and only creeps past it slowly
+    in case the limit has since lifted.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, burst=RATE_BURST, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.ceiling = None
+        self.limited = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def observe(self, response):
+        with self._lock:
+            if response.status_code == 429:
+                delay = retry_after(response)
+                now = time.monotonic()
+                self._refill(now)
+                # One limit window rejects every request in flight at once: back off once per episode
+                if now >= self._blocked_until:
+                    self.ceiling = self.rate
+                    self.rate = max(self.min_rate, self.rate * RATE_BACKOFF)
+                self._blocked_until = max(self._blocked_until,
+                                          now + (DEFAULT_RETRY_AFTER if delay is None else delay))
+                self._tokens = 0.0
+                self.limited += 1
+            elif self.ceiling is None:
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+            elif self.rate < self.ceiling:
+                self.rate = min(self.ceiling, self.rate + RATE_STEP)
+            else:
+                self.rate = min(self.max_rate, self.rate + RATE_PROBE)
+                self.ceiling = self.rate
+
+    def blocked_for(self):
+        """Seconds until requests may go out again after a 429."""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+
+class PlatformClient:
+    def __init__(self, proxies=None, pool_size=DEFAULT_POOL_SIZE, base_url=PLATFORM_URL,
+                 warm_interval=WARM_INTERVAL, timeout=REQUEST_TIMEOUT, governor=None):
+        self.base_url = base_url
+        self.warm_interval = warm_interval
+        self.timeout = timeout
+        self.governor = governor if governor is not None else RateGovernor()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.verify = False
+        if proxies:
+            self.session.proxies.update(proxies)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.last_used = 0.0
+        self._auth = (None, {})
+        self._warm_thread = None
+
+    def url(self, path):
+        return self.base_url + path
+
+    def auth_headers(self, token):
+        cached_token, headers = self._auth
+        if token != cached_token:
+            headers = {"Authorization": f"Bearer {token}"}
+            self._auth = (token, headers)
+        return headers
+
+    def request(self, method, path, token, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        self.governor.acquire()
+        self.last_used = time.monotonic()
+        response = self.session.request(method, self.url(path), headers=self.auth_headers(token), **kwargs)
+        self.governor.observe(response)
+        return response
+
+    def get(self, path, token, **kwargs):
+        return self.request("GET", path, token, **kwargs)
+
+    def post(self, path, token, **kwargs):
+        return self.request("POST", path, token, **kwargs)
+
+    def warm(self, connections=WARM_CONNECTIONS):
+        """Open (or keep alive) `connections` pooled connections with cheap HEAD requests."""
+        if self.governor.blocked_for():
+            return  # rate limited; don't add to the pile
+        def head(_):
+            self.governor.acquire()
+            try:
+                response = self.session.head(self.url("/"), allow_redirects=False, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                return
+            self.governor.observe(response)
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(head, range(connections)))
+
+    def start_warming(self):
+        """Warm now, then again whenever the pool has been idle for warm_interval seconds."""
+        if self._warm_thread is None:
+            self.warm()
+            self._warm_thread = threading.Thread(target=self._keep_warm, daemon=True)
+            self._warm_thread.start()
+        return self
+
+    def _keep_warm(self):
+        while True:
+            idle = time.monotonic() - self.last_used
+            if idle >= self.warm_interval:
+                self.warm()
+                self.last_used = time.monotonic()
+                idle = 0
+            time.sleep(self.warm_interval - idle)
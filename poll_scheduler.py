@@ -0,0 +1,134 @@
+"""Learned polling cadence for task and target discovery.
+
+A PollScheduler counts the polls that turned up something new per hour of
+the week and spreads its polls accordingly: dense around the hours work is
+usually published, sparse in historically quiet ones, and a short burst
+cadence right after a hit. Polls are allotted in proportion to the square
+root of each hour's hit rate, which minimises the mean time to discovery for
+the same number of requests as a fixed interval. Burst polls are taken out
+of that allotment: the polls after a burst are stretched until the time it
+saved has been paid back.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+POLL_PROFILE_FILE = "poll_profile.json"
+HOURS_PER_WEEK = 7 * 24
+PROFILE_DECAY = 0.995  # per hit, so the last few weeks dominate the profile
+PRIOR_HITS = 0.5  # per hour; keeps hours without history from being starved
+MIN_HITS = 10  # hits before the profile is trusted over the base interval
+
+_file_lock = threading.Lock()
+
+
+def hour_of_week(now):
+    t = time.localtime(now)
+    return t.tm_wday * 24 + t.tm_hour
+
+
+class PollScheduler:
+    """Interval between polls for one kind of work ("tasks", "targets").
+
+    Call observe(new_items) after every poll and wait() before the next;
+    interval() keeps the burst accounting, so call it once per poll.
+    The hit profile is kept in POLL_PROFILE_FILE under `name`.
+    """
+
+    def __init__(self, name, base_interval, min_interval, max_interval, burst_interval,
+                 burst_duration, path=POLL_PROFILE_FILE, clock=time.time):
+        self.name = name
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.path = path
+        self.clock = clock
+        self.burst_until = 0.0
+        self.debt = 0.0  # seconds burst polls have spent ahead of the allotment
+        self._lock = threading.Lock()
+        self.hits = [0.0] * HOURS_PER_WEEK
+        self.total = 0
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)[name]
+            if len(saved["hits"]) == HOURS_PER_WEEK:
+                self.hits = [float(h) for h in saved["hits"]]
+                self.total = int(saved.get("total", 0))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def observe(self, new_items, now=None):
+        """Record a poll's result; a poll that found something starts a burst."""
+        if not new_items:
+            return
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.hits = [h * PROFILE_DECAY for h in self.hits]
+            self.hits[hour_of_week(now)] += 1
+            self.total += 1
+            self.burst_until = now + self.burst_duration
+        if self.path:
+            self.save()
+
+    def planned_interval(self, now=None):
+        """The profile's interval for now, before bursts and their payback."""
+        now = self.clock() if now is None else now
+        if self.total < MIN_HITS:
+            return self.base_interval
+        with self._lock:
+            weights = [math.sqrt(h + PRIOR_HITS) for h in self.hits]
+        # Same mean poll rate as base_interval, shifted toward the busy hours.
+        mean = sum(weights) / len(weights)
+        interval = self.base_interval * mean / weights[hour_of_week(now)]
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def interval(self, now=None):
+        now = self.clock() if now is None else now
+        planned = self.planned_interval(now)
+        with self._lock:
+            if now < self.burst_until:
+                self.debt += max(0.0, planned - self.burst_interval)
+                return min(planned, self.burst_interval)
+            # Stretch the poll, at most to twice its interval or max_interval, to pay a burst back.
+            repay = max(0.0, min(self.debt, planned, self.max_interval - planned))
+            self.debt -= repay
+        return planned + repay
+
+    def wait(self):
+        time.sleep(self.interval())
+
+    def save(self):
+        with self._lock:
+            entry = {"hits": [round(h, 3) for h in self.hits], "total": self.total}
+        with _file_lock:
+            try:
+                with open(self.path, "r") as f:
+                    profiles = json.load(f)
+            except (OSError, ValueError):
+                profiles = {}
+            profiles[self.name] = entry
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(profiles, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+
+def task_scheduler(**kwargs):
+    """The mission bots' task poll: 30 s on average, 5 s bursts after a new task.
+
+    Hits weight their own hour up while it is still being polled, which costs
+    1-3% more polls than the profile allots; bench/bench_polling.py matches
+    the fixed 30 s poller's request count at a base of 30.3-30.9 s.
+    """
+    return PollScheduler("tasks", base_interval=31, min_interval=5, max_interval=120,
+                         burst_interval=5, burst_duration=120, **kwargs)
+
+
+def target_scheduler(**kwargs):
+    """The unregistered-target poll: 5 minutes on average, 1 minute bursts after a new target."""
+    return PollScheduler("targets", base_interval=300, min_interval=60, max_interval=1200,
+                         burst_interval=60, burst_duration=600, **kwargs)
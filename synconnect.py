@@ -1,18 +1,28 @@
-import base64
-import json
-import subprocess
+import argparse
+import os
+import queue
 import sys
 import time
-from urllib.parse import parse_qs, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
 
 import requests
+import urllib3
 from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.proxy import Proxy, ProxyType
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from cookie_cache import exchange_grant_token, load_cookies, save_cookies, token_from_cookies
+from duo_prompt import DeviceHistory, DuoPrompt, login_session
+from main import prepare_approver, request_approval
+from token_manager import publish_token
+
+# Proxied sessions skip certificate checks; main no longer silences urllib3 on import.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Replace with your login credentials
 username = 'username'
@@ -25,19 +35,15 @@ proxy_port = ''
 
 DUO_POLL_INTERVAL = 2
 DUO_PUSH_TIMEOUT = 60
-
-BROWSER_FEATURES = (
-    '{"touch_supported":false,"platform_authenticator_status":"unavailable",'
-    '"webauthn_supported":true,"screen_resolution_height":1112,'
-    '"screen_resolution_width":1710,"screen_color_depth":30,'
-    '"is_uvpa_available":false,"client_capabilities_uvpa":false}'
-)
-CLIENT_HINTS = base64.b64encode(json.dumps({
-    "brands": [{"brand": "Not-A.Brand", "version": "24"},
-               {"brand": "Chromium", "version": "146"}],
-    "fullVersionList": [], "mobile": False,
-    "platform": "macOS", "platformVersion": "", "uaFullVersion": "",
-}).encode()).decode()
+DUO_FANOUT = False  # push every enrolled device at once; the first approval wins
+CACHED_SESSION_USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64; rv:128.0) "
+                             "Gecko/20100101 Firefox/128.0")
+HEADLESS = True  # Set to False if you want to see the browser
+PROFILE_DIR = os.path.expanduser("~/.synack_firefox")
+REFRESH_INTERVAL = 3000  # seconds between token refreshes in --resident mode
+LEAN_PROFILE = True  # skip images, web fonts and tracker scripts; don't wait for subresources
+WAIT_POLL = 0.1  # seconds between WebDriverWait checks
+TOKEN_KEY = "shared-session-com.synack.accessToken"
 
 # Check if proxy settings are provided
 if proxy_host and proxy_port:
@@ -48,48 +54,150 @@ if proxy_host and proxy_port:
         'sslProxy': f'{proxy_host}:{proxy_port}',
         'noProxy': ''
     })
-    options = webdriver.FirefoxOptions()
-    options.add_argument('--proxy-server=http://{}:{}'.format(proxy_host, proxy_port))
     requests_proxies = {
         'http': f'http://{proxy_host}:{proxy_port}',
         'https': f'http://{proxy_host}:{proxy_port}',
     }
 else:
-    options = webdriver.FirefoxOptions()
     requests_proxies = None
 
-options.headless = True  # Set to True if you don't want to see the browser
-driver = webdriver.Firefox(options=options)
 
-try:
+def make_options(profile_dir=None):
+    options = webdriver.FirefoxOptions()
+    if proxy_host and proxy_port:
+        options.add_argument('--proxy-server=http://{}:{}'.format(proxy_host, proxy_port))
+    if HEADLESS:
+        options.add_argument('-headless')
+    if LEAN_PROFILE:
+        # The login only needs the DOM and the first-party scripts that write
+        # the token; 'eager' returns from driver.get at DOMContentLoaded.
+        options.page_load_strategy = 'eager'
+        options.set_preference('permissions.default.image', 2)
+        options.set_preference('gfx.downloadable_fonts.enabled', False)
+        options.set_preference('browser.display.use_document_fonts', 0)
+        options.set_preference('privacy.trackingprotection.enabled', True)
+        options.set_preference('media.autoplay.default', 5)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument('-profile')
+        options.add_argument(profile_dir)
+    return options
+
+
+class BrowserPool:
+    """Warm Firefox instances kept between token refreshes.
+
+    Each instance has its own persistent profile under profile_dir. acquire()
+    health-checks the instance (relaunching it if it died) and resets it after
+    the login so the next one starts clean.
+    """
+
+    # Sites whose cookies and storage are cleared between logins.
+    RESET_URLS = ('https://login.synack.com/favicon.ico', 'https://platform.synack.com/favicon.ico')
+
+    def __init__(self, size=1, profile_dir=PROFILE_DIR):
+        self.profile_dir = profile_dir
+        self._idle = queue.Queue()
+        for i in range(size):
+            self._idle.put((i, self._launch(i)))
+
+    def _launch(self, slot):
+        profile = os.path.join(self.profile_dir, str(slot)) if self.profile_dir else None
+        return webdriver.Firefox(options=make_options(profile))
+
+    @staticmethod
+    def healthy(driver):
+        try:
+            return driver.execute_script("return 1;") == 1
+        except WebDriverException:
+            return False
+
+    def reset(self, driver):
+        for url in self.RESET_URLS:
+            driver.get(url)
+            driver.delete_all_cookies()
+            driver.execute_script("window.sessionStorage.clear(); window.localStorage.clear();")
+        driver.get('about:blank')
+
+    def _replace(self, slot, driver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        return self._launch(slot)
+
+    @contextmanager
+    def acquire(self):
+        slot, driver = self._idle.get()
+        try:
+            if not self.healthy(driver):
+                print(f"Browser {slot} failed its health check; relaunching.")
+                driver = self._replace(slot, driver)
+            yield driver
+        finally:
+            try:
+                self.reset(driver)
+            except WebDriverException as e:
+                print(f"Error resetting browser {slot}: {e}; relaunching.")
+                driver = self._replace(slot, driver)
+            self._idle.put((slot, driver))
+
+    def close(self):
+        while not self._idle.empty():
+            _, driver = self._idle.get()
+            try:
+                driver.quit()
+            except WebDriverException as e:
+                print(f"Error closing the browser: {str(e)}")
+
+
+def write_token(token):
+    publish_token(token, file_path)
+
+
+def cached_token():
+    """Token minted from the cached login cookies, or None if a full login is needed."""
+    session = login_session()
+    if requests_proxies:
+        session.proxies.update(requests_proxies)
+        session.verify = False
+    if not load_cookies(session):
+        return None
+    try:
+        return token_from_cookies(session, {"User-Agent": CACHED_SESSION_USER_AGENT})
+    except requests.exceptions.RequestException as e:
+        print(f"Cached session failed: {e}")
+        return None
+
+
+def browser_login(driver):
+    """Full credentials + Duo push login in driver; returns the access token."""
     # Step 1: Login via Selenium
+    wait = WebDriverWait(driver, 30, poll_frequency=WAIT_POLL,
+                         ignored_exceptions=(StaleElementReferenceException,))
     driver.get('https://login.synack.com/')
-    driver.find_element(By.NAME, 'email').send_keys(username)
+    wait.until(EC.element_to_be_clickable((By.NAME, 'email'))).send_keys(username)
     driver.find_element(By.NAME, 'password').send_keys(password)
-    driver.implicitly_wait(20)
+
+    # Step 2: Click through until the Duo frameless prompt URL loads
+    def prompt_or_button(d):
+        if '/prompt/' in urlparse(d.current_url).path:
+            return True
+        buttons = d.find_elements(By.CLASS_NAME, 'btn-blue')
+        return buttons[0] if buttons and buttons[0].is_displayed() and buttons[0].is_enabled() else False
+
     while True:
-        try:
-            button = driver.find_element(By.CLASS_NAME, 'btn-blue')
-            button.click()
-            driver.implicitly_wait(10)
-        except NoSuchElementException:
+        found = wait.until(prompt_or_button)
+        if found is True:
             break
-
-    # Step 2: Wait for the Duo frameless prompt URL to load
-    WebDriverWait(driver, 30).until(
-        lambda d: '/prompt/' in urlparse(d.current_url).path
-    )
-    parsed = urlparse(driver.current_url)
-    duo_base = f"{parsed.scheme}://{parsed.netloc}"
-    akey = parsed.path.split('/prompt/')[1].split('/')[0]
-    qs = parse_qs(parsed.query)
-    authkey = qs.get('authkey', [None])[0]
-    trace_id = qs.get('req_trace_group', [''])[0]
-    if not authkey:
-        raise RuntimeError(f"authkey missing from Duo prompt URL: {driver.current_url}")
+        try:
+            found.click()
+            WebDriverWait(driver, 10, poll_frequency=WAIT_POLL).until(EC.staleness_of(found))
+        except (TimeoutException, WebDriverException):
+            pass  # same page re-rendered, or it moved on mid-click; check again
 
     # Step 3: Mirror Selenium's cookies + UA into a requests session
-    session = requests.Session()
+    session = login_session()
     if requests_proxies:
         session.proxies.update(requests_proxies)
         session.verify = False
@@ -105,95 +213,127 @@ try:
                   "image/avif,image/webp,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.9",
     }
-    duo_headers = {
-        **custom_headers,
-        "Origin": duo_base,
-        "Referer": f"{duo_base}/prompt/{akey}?authkey={authkey}"
-                   f"&req_trace_group={trace_id}",
-        "X-Duo-Req-Trace-Group": trace_id,
-    }
+    prompt = DuoPrompt(session, driver.current_url, custom_headers, history=DeviceHistory())
 
     # Step 4: Duo pre-auth (payload → initialization → evaluation)
-    session.get(
-        f"{duo_base}/prompt/{akey}/auth/payload",
-        params={'authkey': authkey, 'browser_features': BROWSER_FEATURES},
-        headers=duo_headers,
-    )
-    session.get(
-        f"{duo_base}/prompt/{akey}/pre_authn/initialization",
-        params={'authkey': authkey, 'is_ipad': 'false',
-                'client_hints': CLIENT_HINTS},
-        headers=duo_headers,
-    )
-    eval_resp = session.get(
-        f"{duo_base}/prompt/{akey}/pre_authn/evaluation",
-        params={'authkey': authkey, 'browser_features': BROWSER_FEATURES,
-                'local_trust_choice': 'undecided'},
-        headers=duo_headers,
-    )
-    factors = eval_resp.json()['response']['available_unified_auth_factors']['factors']
-    pkeys = [f['device_info']['pkey'] for f in factors if f.get('factor_type') == 'push']
+    executor = ThreadPoolExecutor(max_workers=4)
+    pkeys = prompt.preauth(executor)
     if not pkeys:
         raise RuntimeError("No push-capable Duo devices enrolled")
+    # Fastest-approving devices first, from duo_devices.json
+    pkeys = prompt.history.order(pkeys)
 
     # Step 5: Trigger push on each enrolled device until one succeeds
-    def trigger_and_poll(pkey):
-        r = session.post(
-            f"{duo_base}/prompt/{akey}/auth/factors/push/auth",
-            json={'authkey': authkey, 'pkey': pkey},
-            headers={**duo_headers, "Content-Type": "application/json"},
-        )
-        txid = r.json()['response']['push_txid']
-        subprocess.run(["python3", "main.py"], check=True)
-        deadline = time.time() + DUO_PUSH_TIMEOUT
-        while time.time() < deadline:
-            r = session.get(
-                f"{duo_base}/prompt/{akey}/auth/factors/push/status",
-                params={'authkey': authkey, 'push_txid': txid,
-                        'saw_good_news': 'false'},
-                headers=duo_headers,
-            )
-            result = r.json()['response']['result']['result']
-            if result == 'SUCCESS':
-                return True
-            if result == 'STATUS':
-                time.sleep(DUO_POLL_INTERVAL)
-                continue
-            return False
-        return False
+    def on_push(txids):
+        request_approval(txids[0], timeout=DUO_PUSH_TIMEOUT)
 
     approved = False
-    for pkey in pkeys:
-        if trigger_and_poll(pkey):
-            approved = True
-            break
-        print(f"Push to device {pkey} was not approved; trying next enrolled device.")
+    if DUO_FANOUT:
+        approved = prompt.push_fanout(pkeys, DUO_PUSH_TIMEOUT, DUO_POLL_INTERVAL,
+                                      executor, on_push) is not None
+    else:
+        for pkey in pkeys:
+            if prompt.push_and_wait(pkey, DUO_PUSH_TIMEOUT, DUO_POLL_INTERVAL, on_push):
+                approved = True
+                break
+            print(f"Push to device {pkey} was not approved; trying next enrolled device.")
+    executor.shutdown(wait=False)
     if not approved:
-        print("All Duo push attempts failed or timed out.")
-        sys.exit(1)
+        raise RuntimeError("All Duo push attempts failed or timed out.")
 
-    # Step 6: Finalize the Duo auth and hand control back to Selenium
-    finalize = session.get(
-        f"{duo_base}/prompt/{akey}/auth/finalize_auth",
-        params={'authkey': authkey}, headers=duo_headers,
-    )
-    exit_url = finalize.json()['response']['url']
+    # Step 6: Finalize the Duo auth and follow the redirects in requests, so only
+    # one side ever holds the grant_token: the browser does not load the page
+    # whose own script would try to exchange the same grant.
+    exit_url = prompt.finalize()
+    resume_url = exit_url
+    try:
+        response = session.get(exit_url, headers=custom_headers, allow_redirects=True, timeout=30)
+        if 'grant_token=' in response.url:
+            resume_url = response.url
+            grant_token = response.url.split('grant_token=')[1].split('&')[0]
+            token = exchange_grant_token(session, grant_token, custom_headers)
+            if token:
+                print(f"Value from grant_token exchange: {token[:10]}")
+                save_cookies(session.cookies)
+                return token
+    except requests.exceptions.RequestException as e:
+        print(f"Following the Duo exit URL failed: {e}; finishing in the browser.")
 
-    driver.get(exit_url)
-    WebDriverWait(driver, 50).until(EC.title_contains("Platform"))
+    # Fallback: the browser finishes the login on its own and writes the token
+    # to sessionStorage; requests stays out of it.
+    driver.execute_script("window.location.href = arguments[0];", resume_url)
+    stored_value = WebDriverWait(driver, 50, poll_frequency=WAIT_POLL,
+                                 ignored_exceptions=(WebDriverException,)).until(
+        lambda d: d.execute_script(f"return sessionStorage.getItem('{TOKEN_KEY}');"))
+    print(f"Value from session storage for key '{TOKEN_KEY}': {stored_value[:10]}")
+
+    # Cache the login cookies for the next run. Selenium only returns cookies
+    # for the current site, so visit a static login.synack.com resource too.
+    try:
+        cookies = driver.get_cookies()
+        driver.get('https://login.synack.com/favicon.ico')
+        save_cookies(cookies + driver.get_cookies())
+    except WebDriverException as e:
+        print(f"Could not cache login cookies: {e}")
+    return stored_value
+
+
+def refresh_token(pool=None):
+    """Write a fresh token to file_path, reusing a warm browser from pool if given."""
+    # Try the cached login session first; the browser is only needed if it has expired.
+    token = cached_token()
+    if token:
+        print(f"Reused cached login session: {token[:10]}")
+        write_token(token)
+        return token
+
+    # Reach the approver daemon, or load the device in-process, before the login starts.
+    prepare_approver()
+    if pool is not None:
+        with pool.acquire() as driver:
+            token = browser_login(driver)
+    else:
+        driver = webdriver.Firefox(options=make_options())
+        try:
+            token = browser_login(driver)
+        finally:
+            try:
+                driver.quit()
+            except WebDriverException as e:
+                print(f"Error closing the browser: {str(e)}")
+    write_token(token)
+    return token
 
-    key_to_retrieve = "shared-session-com.synack.accessToken"
-    stored_value = driver.execute_script(
-        f"return sessionStorage.getItem('{key_to_retrieve}');"
-    )
 
-    print(f"Value from session storage for key '{key_to_retrieve}': {stored_value[:10]}")
-    with open(file_path, 'w') as file:
-        file.write(stored_value)
+def main():
+    parser = argparse.ArgumentParser(description="Log in to Synack through Firefox and save the access token.")
+    parser.add_argument("--resident", action="store_true",
+                        help="Keep warm browsers running and refresh the token every --interval seconds")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL)
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Persistent Firefox profiles for --resident")
+    args = parser.parse_args()
 
-finally:
+    if not args.resident:
+        try:
+            refresh_token()
+        except RuntimeError as e:
+            print(e)
+            sys.exit(1)
+        return
+
+    pool = BrowserPool(args.pool_size, args.profile_dir)
     try:
-        if 'driver' in locals() and driver is not None:
-            driver.quit()
-    except WebDriverException as e:
-        print(f"Error closing the browser: {str(e)}")
+        while True:
+            started = time.monotonic()
+            try:
+                refresh_token(pool)
+            except (RuntimeError, WebDriverException, requests.exceptions.RequestException) as e:
+                print(f"Token refresh failed: {e}")
+            time.sleep(max(0, args.interval - (time.monotonic() - started)))
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
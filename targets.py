@@ -0,0 +1,233 @@
+"""Incremental discovery of unregistered targets for the mission bots.
+
+The unregistered-targets list is sorted newest onboardedAt first. A
+TargetStore remembers how far down the list every target has been walked
+(the watermark) and the slugs handled near it, and discover_targets() pages
+forward only until it crosses the watermark: a burst of new targets larger
+than one page is never missed, and a restart does not sign up again for
+targets already handled. Once the walk is done, the new targets are signed
+up concurrently by a SignupPool, which records each outcome in the store; a
+failed signup is retried after SIGNUP_RETRY seconds, and the watermark stays
+below it until then.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+import requests
+
+from claims import send_with_retries
+
+KNOWN_TARGETS_FILE = "known_targets.json"
+TARGET_PAGE_SIZE = 15
+MAX_TARGET_PAGES = 10
+SLUG_RETENTION = 30 * 24 * 3600  # seconds behind the watermark a slug is kept for
+SIGNUP_WORKERS = 4
+SIGNUP_ATTEMPTS = 3  # per target, across 401 refreshes and 429s
+SIGNUP_RETRY = 60  # seconds before a failed signup is tried again, like claims.SEEN_TTL[ERROR]
+
+UNREGISTERED_TARGETS_PATH = (
+    "/api/targets"
+    "?filter%5Bprimary%5D=unregistered&filter%5Bsecondary%5D=all&filter%5Bcategory%5D=all"
+    "&filter%5Bindustry%5D=all&filter%5Bpayout_status%5D=all"
+    "&sorting%5Bfield%5D=onboardedAt&sorting%5Bdirection%5D=desc"
+    "&pagination%5Bpage%5D={page}&pagination%5Bper_page%5D={per_page}"
+)
+
+
+def unregistered_targets_path(page=1, per_page=TARGET_PAGE_SIZE):
+    return UNREGISTERED_TARGETS_PATH.format(page=page, per_page=per_page)
+
+
+def onboarded_at(target):
+    """A target's onboardedAt as epoch seconds, or None if missing or unparseable."""
+    value = target.get("onboardedAt")
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)  # milliseconds or seconds
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def signup_settled(response):
+    """True if a signup response is final: signed up, or refused for good rather than for now."""
+    return response is not None and response.status_code not in (401, 429) and response.status_code < 500
+
+
+class TargetStore:
+    """Watermark, handled slugs and failed signups, kept on disk.
+
+    Saved as {"watermark": t, "slugs": {slug: t}, "failed": {slug: [t, retry_at]}},
+    where t is the target's onboardedAt.
+    """
+
+    def __init__(self, path=KNOWN_TARGETS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+            self.watermark = saved.get("watermark")
+            self.slugs = dict(saved.get("slugs", {}))
+            self.failed = dict(saved.get("failed", {}))
+        except (OSError, ValueError, AttributeError, TypeError):
+            self.watermark = None
+            self.slugs = {}
+            self.failed = {}
+
+    def __contains__(self, slug):
+        return slug in self.slugs
+
+    def should_sign_up(self, slug):
+        entry = self.failed.get(slug)
+        return slug not in self.slugs and (entry is None or entry[1] <= time.time())
+
+    def retrying(self, slug):
+        """True if an earlier signup for slug failed, so it is not news."""
+        return slug in self.failed
+
+    def horizon(self):
+        """Where a walk may stop: the watermark, or the oldest failed target below it."""
+        with self._lock:
+            pending = [t for t, _ in self.failed.values() if t is not None]
+            if self.watermark is None or not pending:
+                return self.watermark
+            return min([self.watermark] + pending)
+
+    def advance(self, newest):
+        """Move the watermark up to newest, once every target above it has been walked."""
+        with self._lock:
+            if newest is not None and (self.watermark is None or newest > self.watermark):
+                self.watermark = newest
+
+    def record(self, target, response):
+        """Remember a signup's outcome: settled slugs are done, others retried after SIGNUP_RETRY."""
+        slug = target["slug"]
+        seen_at = onboarded_at(target)
+        with self._lock:
+            if signup_settled(response):
+                self.slugs[slug] = seen_at
+                self.failed.pop(slug, None)
+            else:
+                self.failed[slug] = [seen_at, round(time.time() + SIGNUP_RETRY)]
+
+    def save(self):
+        with self._lock:
+            if self.watermark is not None:
+                horizon = self.watermark - SLUG_RETENTION
+                self.slugs = {slug: t for slug, t in self.slugs.items() if t is None or t >= horizon}
+                self.failed = {slug: entry for slug, entry in self.failed.items()
+                               if entry[0] is None or entry[0] >= horizon}
+            data = {"watermark": self.watermark, "slugs": self.slugs, "failed": self.failed}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+
+def discover_targets(fetch_page, first_page, store, per_page=TARGET_PAGE_SIZE, max_pages=MAX_TARGET_PAGES):
+    """The targets the store says to sign up for, from first_page and following pages, newest first.
+
+    fetch_page(page) returns the response for that page of the list. Paging
+    stops at the first target older than the store's horizon as it stood
+    before this poll, at a short page, at max_pages, or at a failed request.
+    Only a walk that reached the horizon or a short page advances the
+    watermark (on the first run, max_pages counts too), so targets behind a
+    failed page are walked again next poll. The list is paged by offset and
+    a signup takes its target off it, so sign up only after this returns;
+    record each outcome in the store, then call store.save().
+    """
+    horizon = store.horizon()
+    newest = None
+    found = []
+    slugs = set()
+    page, targets = 1, first_page
+    while True:
+        for target in targets:
+            seen_at = onboarded_at(target)
+            if horizon is not None and seen_at is not None and seen_at < horizon:
+                store.advance(newest)
+                return found
+            if seen_at is not None and (newest is None or seen_at > newest):
+                newest = seen_at
+            slug = target["slug"]
+            if slug not in slugs and store.should_sign_up(slug):
+                slugs.add(slug)  # new targets push the list down while we page; sign up once
+                found.append(target)
+        if len(targets) < per_page or (page >= max_pages and horizon is None):
+            store.advance(newest)
+            return found
+        if page >= max_pages:
+            print(f"Stopped after {max_pages} target pages; walking them again next poll.")
+            return found
+        page += 1
+        try:
+            response = fetch_page(page)
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to fetch a target page: {e}")
+            return found
+        if response.status_code != 200:
+            print(f"Failed to fetch a target page. Status code: {response.status_code}")
+            return found
+        targets = response.json()
+
+
+class SignupPool:
+    """Signs up for targets on up to `workers` threads through signup(client, token, slug).
+
+    The workers share the bot's PlatformClient, so signups use its pooled
+    connections and draw on the same rate budget as everything else.
+    on_result(target, response, seconds) is called from the worker thread
+    after every target; response is None if the request itself failed or
+    the token could not be refreshed. With a TargetStore, every outcome is
+    recorded in it.
+    """
+
+    def __init__(self, client, tokens, signup, workers=SIGNUP_WORKERS, on_result=None, store=None):
+        self.client = client
+        self.tokens = tokens
+        self.signup = signup
+        self.on_result = on_result or report_signup
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(self, target):
+        return self._executor.submit(self._signup, target)
+
+    def wait(self, futures):
+        """Block until futures finish; returns their (target, response, seconds) results."""
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def _signup(self, target):
+        started = time.monotonic()
+        try:
+            response = send_with_retries(lambda token: self.signup(self.client, token, target["slug"]),
+                                         self.tokens, SIGNUP_ATTEMPTS, f"Signup request for target {target['slug']}")
+        except Exception as e:  # e.g. a failed token refresh; wait() must not re-raise it
+            print(f"Signup for target {target['slug']} failed: {e}")
+            response = None
+        if self.store is not None:
+            self.store.record(target, response)
+        result = (target, response, time.monotonic() - started)
+        try:
+            self.on_result(*result)
+        except Exception as e:
+            print(f"Signup result handler failed for {target['slug']}: {e}")
+        return result
+
+
+def report_signup(target, response, seconds):
+    if response is not None and response.status_code == 200:
+        print(f"Signed up for target {target['slug']} successfully in {seconds * 1000:.0f} ms.")
+    elif response is not None:
+        print(f"Failed to sign up for target {target['slug']}. "
+              f"Status code: {response.status_code}, Response: {response.text}")
+    else:
+        print(f"Failed to sign up for target {target['slug']}. Status code: no response")
@@ -0,0 +1,120 @@
+"""AsyncClient against bench/stub_duo.py; run with python3 -m pytest tests."""
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
+
+import pytest  # noqa: E402
+from Crypto.PublicKey import RSA  # noqa: E402
+
+from async_client import AsyncClient  # noqa: E402
+from stub_duo import StubDuoServer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def key():
+    return RSA.generate(2048)
+
+
+@pytest.fixture
+def server():
+    server = StubDuoServer().start()
+    yield server
+    server.stop()
+
+
+def make_client(server, key, **kwargs):
+    client = AsyncClient(akey="DAtest", pkey="DPtest", host=server.duo_host, base_url=server.url, **kwargs)
+    client.pubkey = key
+    return client
+
+
+def run(client, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def test_approve_pending_answers_pushes(server, key):
+    server.push("tx-1")
+    server.push("tx-2")
+    client = make_client(server, key)
+    records = run(client, client.approve_pending(timeout=5, poll_interval=0.05))
+    assert sorted(r["urgid"] for r in records) == ["tx-1", "tx-2"]
+    assert all("response" in r for r in records)
+    assert sorted(server.answered) == ["tx-1", "tx-2"]
+    assert server.pending() == []
+
+
+def test_approve_pending_times_out_empty(server, key):
+    client = make_client(server, key)
+    assert run(client, client.approve_pending(timeout=0.2, poll_interval=0.05)) == []
+
+
+def test_read_timeout_does_not_end_the_wait(server, key):
+    # Every poll outlives the 0.1 s read timeout until the stub speeds up and a push arrives.
+    server.latency = 0.3
+    client = make_client(server, key, timeout=(1, 0.1))
+
+    async def speed_up_and_push():
+        await asyncio.sleep(0.5)
+        server.latency = 0.0
+        server.push("late-tx")
+
+    async def scenario():
+        pusher = asyncio.ensure_future(speed_up_and_push())
+        records = await client.approve_pending(timeout=5, poll_interval=0.05)
+        await pusher
+        return records
+
+    records = run(client, scenario())
+    assert [r["urgid"] for r in records] == ["late-tx"]
+
+
+class FlakyClient(AsyncClient):
+    """Polls fail with a bare asyncio.TimeoutError, as a per-request timeout raises, then recover."""
+
+    failures = 3
+
+    async def get_transactions(self):
+        if self.failures:
+            self.failures -= 1
+            raise asyncio.TimeoutError()
+        return await super().get_transactions()
+
+
+def test_request_timeout_is_not_the_overall_timeout(server, key):
+    server.push("tx-after-timeouts")
+    client = FlakyClient(akey="DAtest", pkey="DPtest", host=server.duo_host, base_url=server.url)
+    client.pubkey = key
+    records = run(client, client.approve_pending(timeout=5, poll_interval=0.05))
+    assert [r["urgid"] for r in records] == ["tx-after-timeouts"]
+    assert client.failures == 0
+
+
+def test_fail_reply_keeps_polling(server, key):
+    class FailOnce(AsyncClient):
+        failed = False
+
+        async def get_transactions(self):
+            if not self.failed:
+                self.failed = True
+                return {"stat": "FAIL", "message": "stub failure"}
+            return await super().get_transactions()
+
+    server.push("tx-after-fail")
+    client = FailOnce(akey="DAtest", pkey="DPtest", host=server.duo_host, base_url=server.url)
+    client.pubkey = key
+    records = run(client, client.approve_pending(timeout=5, poll_interval=0.05))
+    assert [r["urgid"] for r in records] == ["tx-after-fail"]
+
+
+def test_device_info(server, key):
+    client = make_client(server, key)
+    info = run(client, client.device_info())
+    assert info == {"stat": "OK", "response": {"host": server.duo_host}}
@@ -0,0 +1,60 @@
+"""Task discovery and claiming against bench/stub_platform.py, which drops a task once it is claimed."""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
+
+import pytest  # noqa: E402
+
+from claims import TASK_PAGE_SIZE, ClaimPipeline, SeenTaskIndex, discover_tasks  # noqa: E402
+from platform_client import PlatformClient, RateGovernor  # noqa: E402
+from stub_platform import StubPlatformServer  # noqa: E402
+
+CLAIM_PATH = "/api/tasks/v1/organizations/org/listings/listing/campaigns/campaign/tasks/{}/transitions"
+
+
+class StaticTokens:
+    def get(self):
+        return "test-token"
+
+    def refresh(self, stale=None):
+        return "test-token"
+
+
+@pytest.fixture
+def server():
+    server = StubPlatformServer(latency=0.02).start()
+    yield server
+    server.stop()
+
+
+def get_tasks(client, page):
+    return client.get("/api/tasks/v2/tasks", "test-token", params={"page": page, "perPage": TASK_PAGE_SIZE})
+
+
+def post_claim(client, token, task):
+    return client.post(CLAIM_PATH.format(task["id"]), token, json={"type": "CLAIM"})
+
+
+def claim_cycle(server, tmp_path):
+    """One poll cycle as the bots run it, over 50 published tasks."""
+    for i in range(50):
+        server.add_task(f"task-{i:02d}")
+    client = PlatformClient(base_url=server.url, governor=RateGovernor(rate=1e6, burst=1e6, max_rate=1e6))
+    seen = SeenTaskIndex(str(tmp_path / "seen_tasks.json"))
+    pipeline = ClaimPipeline(client, StaticTokens(), post_claim, on_result=lambda *args: None, seen=seen).start()
+    with ThreadPoolExecutor(max_workers=2) as pages:
+        for task in discover_tasks(lambda page: get_tasks(client, page), get_tasks(client, 1).json(),
+                                   seen=seen, executor=pages, settle=pipeline.join):
+            pipeline.submit(task)
+        pipeline.join()
+    return pipeline.counts
+
+
+def test_claims_shifting_later_pages_do_not_skip_tasks(server, tmp_path):
+    counts = claim_cycle(server, tmp_path)
+    assert counts == {"claimed": 50, "412": 0, "error": 0}
+    assert server.open_tasks() == []
+
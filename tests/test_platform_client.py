@@ -0,0 +1,41 @@
+"""RateGovernor's backoff and recovery, driven with fake responses."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from platform_client import RATE_BACKOFF, RateGovernor  # noqa: E402
+
+
+class Response:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+
+def test_concurrent_429s_back_off_once():
+    governor = RateGovernor(rate=4)
+    for _ in range(5):  # every request in flight when the limit window closed
+        governor.observe(Response(429, "30"))
+    assert governor.rate == 4 * RATE_BACKOFF
+    assert governor.ceiling == 4
+    assert governor.limited == 5
+    assert 29 < governor.blocked_for() <= 30
+
+
+def test_429_after_the_hold_backs_off_again():
+    governor = RateGovernor(rate=4)
+    governor.observe(Response(429, "0"))
+    governor.observe(Response(429, "0"))
+    assert governor.rate == 4 * RATE_BACKOFF ** 2
+    assert governor.ceiling == 4 * RATE_BACKOFF
+
+
+def test_recovery_stops_at_the_ceiling_then_probes():
+    governor = RateGovernor(rate=4)
+    governor.observe(Response(429, "0"))
+    for _ in range(100):
+        governor.observe(Response(200))
+    assert 4 < governor.rate < 4.5
+    assert governor.ceiling == governor.rate
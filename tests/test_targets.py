@@ -0,0 +1,107 @@
+"""Target discovery and signup bookkeeping against an in-memory target list."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest  # noqa: E402
+
+from targets import TargetStore, discover_targets  # noqa: E402
+
+PER_PAGE = 15
+
+
+class Response:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+        self.text = ""
+
+    def json(self):
+        return self.body
+
+
+class TargetList:
+    """The unregistered-targets list: newest first, paged by offset, and a signup takes a target off it."""
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+        self.signed_up = []
+
+    def page(self, page):
+        return self.targets[(page - 1) * PER_PAGE:page * PER_PAGE]
+
+    def fetch_page(self, page):
+        return Response(200, self.page(page))
+
+    def signup(self, target):
+        self.targets = [t for t in self.targets if t["slug"] != target["slug"]]
+        self.signed_up.append(target["slug"])
+        return Response(200)
+
+
+def targets(prefix, count, newest):
+    return [{"slug": f"{prefix}{i}", "onboardedAt": newest - i} for i in range(count)]
+
+
+def poll(store, listing, signup=None):
+    """One poll as the bots run it: walk, then sign up, then save."""
+    signup = signup or listing.signup
+    found = discover_targets(listing.fetch_page, listing.page(1), store, per_page=PER_PAGE)
+    for target in found:
+        store.record(target, signup(target))
+    store.save()
+    return [target["slug"] for target in found]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TargetStore(str(tmp_path / "known_targets.json"))
+
+
+def test_signups_shrinking_the_list_do_not_skip_targets(store):
+    listing = TargetList(targets("old", 5, 1000))
+    poll(store, listing)
+    assert store.watermark == 1000
+
+    listing.targets[:0] = targets("s", 40, 2000)
+    assert len(poll(store, listing)) == 40
+    assert sorted(listing.signed_up) == sorted([f"old{i}" for i in range(5)] + [f"s{i}" for i in range(40)])
+    assert store.watermark == 2000
+    assert poll(store, listing) == []
+
+
+def test_failed_page_keeps_the_watermark(store):
+    listing = TargetList(targets("old", 5, 1000))
+    poll(store, listing)
+    listing.targets[:0] = targets("s", 20, 2000)
+
+    found = discover_targets(lambda page: Response(503), listing.page(1), store, per_page=PER_PAGE)
+    assert len(found) == PER_PAGE
+    assert store.watermark == 1000
+
+    for target in found:
+        store.record(target, listing.signup(target))
+    assert poll(store, listing) == [f"s{i}" for i in range(15, 20)]
+    assert store.watermark == 1985  # the newest target still listed; the ones above it are handled
+    assert poll(store, listing) == []
+
+
+def test_failed_signup_is_retried_and_holds_the_horizon(store):
+    listing = TargetList(targets("old", 5, 1000))
+    poll(store, listing)
+    listing.targets[:0] = targets("s", 3, 2000)
+
+    def flaky(target):
+        return Response(503) if target["slug"] == "s2" else listing.signup(target)
+
+    assert poll(store, listing, flaky) == ["s0", "s1", "s2"]
+    assert store.retrying("s2") and "s2" not in store
+    assert store.horizon() == 1998
+    assert poll(store, listing) == []  # not due yet
+
+    store.failed["s2"][1] = 0
+    assert poll(store, listing) == ["s2"]
+    assert "s2" in store and not store.retrying("s2")
+    assert TargetStore(store.path).slugs.keys() >= {"s0", "s1", "s2"}
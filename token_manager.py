@@ -0,0 +1,246 @@
+"""Access-token handling shared by the long-running scripts.
+
+One TokenHolder per process: every thread reads the current token from it,
+and a 401 anywhere calls refresh(stale=token). Concurrent refreshes for the
+same stale token collapse into one call of the refresher, and a background
+thread refreshes shortly before the JWT's exp claim.
+
+Tokens are published to TOKEN_FILE atomically (write + rename) with a
+version/expiry sidecar, and watch_file() picks up a new token the moment it
+lands (inotify on Linux).
+"""
+import base64
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+TOKEN_FILE = '/tmp/synacktoken'
+REFRESH_MARGIN = 300  # seconds before exp to refresh proactively
+RETRY_DELAY = 60  # seconds before retrying a failed proactive refresh
+WATCH_POLL_INTERVAL = 1  # seconds; only used where inotify is unavailable
+
+
+def jwt_expiry(token):
+    """The exp claim of a JWT as a Unix timestamp, or None if it cannot be read."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _write_atomic(path, data, mode=0o600):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                               prefix=f".{os.path.basename(path)}.")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_meta(path=TOKEN_FILE):
+    try:
+        with open(path + ".meta", "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def publish_token(token, path=TOKEN_FILE):
+    """Replace the token file atomically, then its sidecar ({version, exp, written_at})."""
+    version = read_meta(path).get("version", 0) + 1
+    _write_atomic(path, token)
+    _write_atomic(path + ".meta", json.dumps(
+        {"version": version, "exp": jwt_expiry(token), "written_at": time.time()}))
+    return version
+
+
+def read_token(path=TOKEN_FILE):
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+class _Inotify:
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._libc = libc
+
+    def add_watch(self, path, mask):
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+
+    def names(self):
+        """Block until events arrive; returns the file names they refer to."""
+        data = os.read(self.fd, 64 * 1024)
+        names, offset = [], 0
+        while offset < len(data):
+            _, _, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            names.append(data[offset:offset + length].rstrip(b"\0").decode(errors="replace"))
+            offset += length
+        return names
+
+
+class TokenFileWatcher:
+    """Calls callback(token) whenever a new token is published to path."""
+
+    def __init__(self, path, callback):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _deliver(self):
+        try:
+            token = read_token(self.path)
+        except OSError:
+            return
+        if token:
+            self.callback(token)
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                inotify = _Inotify()
+                # Watch the directory: an atomic publish replaces the file's inode.
+                inotify.add_watch(os.path.dirname(self.path), _Inotify.IN_CLOSE_WRITE | _Inotify.IN_MOVED_TO)
+            except OSError as e:
+                print(f"inotify unavailable ({e}); polling {self.path} instead")
+            else:
+                name = os.path.basename(self.path)
+                while True:
+                    if name in inotify.names():
+                        self._deliver()
+        last = None
+        while True:
+            try:
+                stamp = os.stat(self.path).st_mtime_ns
+            except OSError:
+                stamp = None
+            if stamp is not None and stamp != last:
+                last = stamp
+                self._deliver()
+            time.sleep(WATCH_POLL_INTERVAL)
+
+
+def login_in_process():
+    """Fresh token from the requests-based login in synconnect_cli, also written to its token file."""
+    import synconnect_cli
+
+    try:
+        token = synconnect_cli.synack()
+    except SystemExit:
+        token = None  # synack() exits on errors it has already printed
+    if token:
+        synconnect_cli.write_token_to_file(token, synconnect_cli.file_path)
+    return token
+
+
+def prompt_for_token():
+    print("Token expired. Please enter a new token:")
+    return input("New Token: ")
+
+
+def first_of(*refreshers):
+    """Refresher that tries each refresher in turn until one returns a token."""
+    def refresh():
+        for refresher in refreshers:
+            try:
+                token = refresher()
+            except Exception as e:
+                print(f"Token refresh via {refresher.__name__} failed: {e}")
+                continue
+            if token:
+                return token
+        return None
+    return refresh
+
+
+class TokenHolder:
+    def __init__(self, token=None, refresher=login_in_process, refresh_margin=REFRESH_MARGIN):
+        self.refresher = refresher
+        self.refresh_margin = refresh_margin
+        self._token = token
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._thread = None
+
+    def get(self):
+        with self._lock:
+            return self._token
+
+    def set(self, token):
+        with self._lock:
+            self._token = token
+        self._changed.set()
+
+    def refresh(self, stale=None):
+        """Refresh unless another thread already replaced stale; returns the current token."""
+        with self._refresh_lock:
+            current = self.get()
+            if stale is not None and current != stale:
+                return current
+            token = self.refresher() if self.refresher else None
+            if token:
+                self.set(token)
+                return token
+            return current
+
+    def watch_file(self, path=TOKEN_FILE):
+        """Adopt every token published to path (by any process) as soon as it lands."""
+        def adopt(token):
+            if token != self.get():
+                print("Picked up a new access token from", path)
+                self.set(token)
+        TokenFileWatcher(path, adopt).start()
+        return self
+
+    def seconds_left(self):
+        exp = jwt_expiry(self.get())
+        return None if exp is None else exp - time.time()
+
+    def start(self):
+        """Refresh in the background refresh_margin seconds before the token expires."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self._changed.clear()
+            left = self.seconds_left()
+            if left is None:
+                self._changed.wait()  # unknown expiry: wait for the next token
+                continue
+            if self._changed.wait(max(0, left - self.refresh_margin)):
+                continue  # token replaced meanwhile; recompute
+            token = self.get()
+            print("Access token is about to expire; refreshing.")
+            if self.refresh(stale=token) == token:
+                time.sleep(RETRY_DELAY)
@@ -2,9 +2,12 @@ import requests
 import json
 import urllib3
 import sqlite3
+import threading
 import time
 from datetime import datetime
 
+from token_manager import TokenHolder
+
 # Suppress only the single InsecureRequestWarning from urllib3 needed for this use case.
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -15,15 +18,24 @@ def read_token():
     with open(token_file_path, 'r') as file:
         return file.read().strip()
 
-# Initial read of the authorization token
-auth_token = read_token()
+# Authorization token holder, created on first use and kept in sync with the token file
+_tokens = None
+_tokens_lock = threading.Lock()
+
+def get_tokens():
+    """The shared TokenHolder; picks up each token published to the file immediately, no 401 needed."""
+    global _tokens
+    with _tokens_lock:
+        if _tokens is None:
+            _tokens = TokenHolder(read_token(), refresher=read_token).watch_file(token_file_path)
+        return _tokens
 
 # Base URL and headers for the request
 base_url = "https://platform.synack.com/api/targets"
 headers = {
     "Sec-Ch-Ua": '"Chromium";v="125", "Not.A/Brand";v="24"',
     "Sec-Ch-Ua-Mobile": "?0",
-    "Authorization": f"Bearer {auth_token}",
+    "Authorization": "",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.6422.112 Safari/537.36",
     "Sec-Ch-Ua-Platform": '"Linux"',
     "Accept": "*/*",
@@ -59,26 +71,29 @@ proxies = {
 #slack_webhook_url = 'https://hooks.slack.com/services/something'
 
 
-# Connect to the SQLite database (or create it if it doesn't exist)
-conn = sqlite3.connect('synack_data.db')
-c = conn.cursor()
+def open_db(path='synack_data.db'):
+    # Connect to the SQLite database (or create it if it doesn't exist)
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
 
-# Create table for storing the data
-c.execute('''CREATE TABLE IF NOT EXISTS targets (
-                id TEXT PRIMARY KEY,
-                data TEXT
-            )''')
-conn.commit()
+    # Create table for storing the data
+    c.execute('''CREATE TABLE IF NOT EXISTS targets (
+                    id TEXT PRIMARY KEY,
+                    data TEXT
+                )''')
+    conn.commit()
+    return conn
 
-def fetch_data():
-    global auth_token
+def fetch_data(tokens=None):
+    tokens = tokens or get_tokens()
     all_data = []
     params["pagination[page]"] = 1  # Reset page to 1 for each poll
     while True:
+        auth_token = tokens.get()
         headers["Authorization"] = f"Bearer {auth_token}"
         response = requests.get(base_url, headers=headers, params=params, proxies=proxies, verify=False)
         if response.status_code == 401:
-            auth_token = read_token()
+            auth_token = tokens.refresh(stale=auth_token)
             headers["Authorization"] = f"Bearer {auth_token}"
             response = requests.get(base_url, headers=headers, params=params, proxies=proxies, verify=False)
         
@@ -169,32 +184,40 @@ def print_and_send_differences(old_data, new_data):
     if slack_message:
         send_to_slack(slack_message)
 
-while True:
-    try:
-        # Print the current date and time
-        print(f"\nPolling at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+def main():
+    tokens = get_tokens()
+    conn = open_db()
+    c = conn.cursor()
+
+    while True:
+        try:
+            # Print the current date and time
+            print(f"\nPolling at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+            # Fetch new data
+            new_data = fetch_data(tokens)
 
-        # Fetch new data
-        new_data = fetch_data()
+            # Fetch old data from the database
+            c.execute("SELECT id, data FROM targets")
+            old_data = {row[0]: json.loads(row[1]) for row in c.fetchall()}
 
-        # Fetch old data from the database
-        c.execute("SELECT id, data FROM targets")
-        old_data = {row[0]: json.loads(row[1]) for row in c.fetchall()}
+            # Print and send differences
+            print_and_send_differences(old_data, new_data)
 
-        # Print and send differences
-        print_and_send_differences(old_data, new_data)
+            # Store new and updated data in the database
+            for target_id, data in new_data.items():
+                c.execute("INSERT OR REPLACE INTO targets (id, data) VALUES (?, ?)", (target_id, json.dumps(data)))
+            conn.commit()
 
-        # Store new and updated data in the database
-        for target_id, data in new_data.items():
-            c.execute("INSERT OR REPLACE INTO targets (id, data) VALUES (?, ?)", (target_id, json.dumps(data)))
-        conn.commit()
+            # Wait for 10 minutes before the next poll
+            time.sleep(600)
+        except requests.exceptions.RequestException as e:
+            print(f"Connection error: {e}")
+            print("Waiting for 10 minutes before retrying...")
+            time.sleep(600)
 
-        # Wait for 10 minutes before the next poll
-        time.sleep(600)
-    except requests.exceptions.RequestException as e:
-        print(f"Connection error: {e}")
-        print("Waiting for 10 minutes before retrying...")
-        time.sleep(600)
+    # Close the database connection
+    conn.close()
 
-# Close the database connection
-conn.close()
+if __name__ == "__main__":
+    main()